@@ -0,0 +1,209 @@
+import os
+import re
+import sys
+import json
+import glob
+import shutil
+import time
+import random
+import timeit
+import subprocess
+import tempfile
+import importlib.util
+import urllib.request
+from prompts import Prompts, PrefixPrompts
+
+
+def tokenize(text):
+    # 近似分词：单词和标点各算一个token
+    return re.findall(r"\w+|[^\w\s]", text)
+
+
+def prefix_hit_rate(prompts, block_size=16, images=None, image_tokens=600):
+    """
+    模拟vLLM自动前缀缓存(APC)：prompt按block_size个token切块，块的hash包含之前的全部内容，
+    统计命中已缓存块的比例（只有完整的块会被缓存，缓存容量不设上限）
+    images给出时每个prompt带一张图片，按MLLM.messages中的位置插入image_tokens个该图片独有的token：
+    默认在prompt开头，PrefixPrompts的prompt在固定前缀之后
+    """
+    cached = set()
+    hits, total = 0, 0
+    for k, prompt in enumerate(prompts):
+        tokens = tokenize(prompt)
+        if images is not None:
+            prefix = getattr(prompt, "prefix", "")
+            position = len(tokenize(prefix)) if prefix else 0
+            tokens[position:position] = [("<image>", images[k], j) for j in range(image_tokens)]
+        block_hash = None
+        for i in range(0, len(tokens) - block_size + 1, block_size):
+            block_hash = hash((block_hash, tuple(tokens[i:i + block_size])))
+            total += 1
+            if block_hash in cached:
+                hits += 1
+            else:
+                cached.add(block_hash)
+    return hits / total if total > 0 else 0
+
+
+def bench_prefix(data_path="./dataset/Judge_Before_Answer.json", n=2000, seed=42):
+    """
+    对比原始布局和PrefixPrompts布局下caption/question/answer三个步骤的前缀命中率
+    caption和answer是MLLM请求，计入图片token
+    """
+    with open(data_path, "r") as f:
+        data = json.load(f)
+    random.seed(seed)
+    data = random.sample(data, min(n, len(data)))  # 打乱顺序，模拟多种类型的请求交错到达
+    images = [d.get("image_path") or d.get("id") for d in data]
+
+    print(f"{'step':<22}{'inline':>10}{'prefix':>10}")
+    for step in ["caption", "question", "answer"]:
+        rates = []
+        for prompts_cls in [Prompts, PrefixPrompts]:
+            prompts = []
+            for d in data:
+                generater = prompts_cls(d["type"])
+                # 数据集中没有caption，用question代替
+                if step == "caption":
+                    prompts.append(generater.get_caption_prompt(d["premise"]))
+                elif step == "question":
+                    prompts.append(generater.get_generate_question_prompt(d["question"], d["premise"]))
+                else:
+                    prompts.append(generater.get_answer_prompt(d["question"], d["premise"]))
+            rates.append(prefix_hit_rate(prompts, images=None if step == "question" else images))
+        print(f"{step:<22}{rates[0]:>10.1%}{rates[1]:>10.1%}")
+
+
+def import_time(module_path):
+    """ 在新的解释器中测量导入一个模块的耗时(毫秒)，取5次的最小值 """
+    code = "import time, importlib.util; t = time.perf_counter(); " \
+           f"spec = importlib.util.spec_from_file_location('m', {module_path!r}); " \
+           "spec.loader.exec_module(importlib.util.module_from_spec(spec)); print((time.perf_counter() - t) * 1000)"
+    return min(float(subprocess.run([sys.executable, "-c", code], capture_output=True, text=True).stdout) for _ in range(5))
+
+
+def render_cost(prompts_cls, number=20000):
+    """ 每次"创建Prompts对象+渲染一个prompt"的平均耗时(微秒)，与pipeline中的用法一致 """
+    cost = {}
+    for name, call in [
+        ("judge", lambda t: prompts_cls(t).get_judge_prompt()),
+        ("caption", lambda t: prompts_cls(t).get_caption_prompt("cat")),
+        ("question", lambda t: prompts_cls(t).get_generate_question_prompt("A cat is on the sofa.", "cat")),
+        ("answer", lambda t: prompts_cls(t).get_answer_prompt("What color is the dog?", "cat")),
+    ]:
+        types = prompts_cls.supported_types
+        cost[name] = min(timeit.repeat(lambda: [call(t) for t in types], number=number // len(types), repeat=3)) \
+                     / (number // len(types) * len(types)) * 1e6
+    return cost
+
+
+def bench_templates(legacy_path=None):
+    """
+    模板注册表的导入耗时和单次渲染耗时
+    legacy_path: 旧版本prompts.py的路径（如 git show <rev>:prompts.py > /tmp/prompts_old.py），提供时一并对比
+    """
+    modules = {"registry": "./prompts.py"}
+    if legacy_path:
+        modules["legacy"] = legacy_path
+    print(f"{'':<12}{'import(ms)':>12}{'judge(us)':>12}{'caption(us)':>12}{'question(us)':>14}{'answer(us)':>12}")
+    for name, path in modules.items():
+        spec = importlib.util.spec_from_file_location(f"prompts_{name}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        cost = render_cost(module.Prompts)
+        print(f"{name:<12}{import_time(path):>12.2f}{cost['judge']:>12.2f}{cost['caption']:>12.2f}"
+              f"{cost['question']:>14.2f}{cost['answer']:>12.2f}")
+
+
+def start_mock_server(ports, *args):
+    """ 启动mock_server.py子进程，等待所有端口可用 """
+    server = subprocess.Popen([sys.executable, "mock_server.py", "--port", ",".join(map(str, ports)), *args],
+                              cwd=os.path.dirname(os.path.abspath(__file__)))
+    for port in ports:
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(f"http://localhost:{port}/health", timeout=1)
+                break
+            except OSError:
+                time.sleep(0.1)
+    return server
+
+
+def run_step(code, workspace, env):
+    """ 在workspace中用新的解释器执行code，返回(耗时, 峰值RSS(MB)) """
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-c", code], cwd=workspace, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    if process.returncode != 0:
+        raise RuntimeError(f"benchmark step failed: {code}")
+    return time.perf_counter() - start, usage.ru_maxrss / 1024
+
+
+def count_lines(path):
+    with open(path, "r") as f:
+        return sum(1 for _ in f)
+
+
+def bench_e2e(n_images=600, type_capacity=5, server_args=("--latency", "0.2", "--token-rate", "200"), fresh=True):
+    """
+    端到端吞吐：在临时目录中依次运行 main → sft → grpo → test(sweep) → evaluate(judge_with_LLM)
+    模型服务由mock_server.py模拟（MLLM/LLM/待测模型各一个端口），图片为随机字节，缓存均从空开始
+    输出每一步的 条/秒、请求延迟p50/p99(来自metrics快照) 和 峰值RSS
+    fresh: 每一步之前清空回复缓存和PremiseStore，否则sft/grpo会复用main的judge/caption结果
+    """
+    repo = os.path.dirname(os.path.abspath(__file__))
+    workspace = tempfile.mkdtemp(prefix="jba_bench_")
+    image_dir = os.path.join(workspace, "images")
+    os.makedirs(image_dir)
+    rng = random.Random(0)
+    for i in range(n_images):
+        with open(os.path.join(image_dir, f"{i}.jpg"), "wb") as f:
+            f.write(rng.randbytes(20000))
+    ports = [17777, 18888, 17001]
+    with open(os.path.join(workspace, "manifest.json"), "w") as f:
+        json.dump([{"model": "mock", "port": ports[2]}], f)
+
+    steps = [
+        ("main", f"import main; main.main(image_dir={image_dir!r}, type_capacity={type_capacity})",
+         "./dataset/incorrect_premise_questions_Test.jsonl"),
+        ("sft", f"import sft; sft.main(image_dir={image_dir!r}, type_capacity={type_capacity})",
+         "./dataset/incorrect_premise_questions_SFT.jsonl"),
+        ("grpo", f"import grpo; grpo.main(image_dir={image_dir!r}, type_capacity={type_capacity})",
+         "./dataset/incorrect_premise_questions_GRPO.jsonl"),
+        ("test", "import test; test.sweep('manifest.json')", "./results/test_results_mock.jsonl"),
+        ("evaluate", "import evaluate; evaluate.judge_with_LLM('./results/test_results_mock.json')",
+         "./evaluate_results/test_results_mock.jsonl"),
+    ]
+    server = start_mock_server(ports, *server_args)
+    print(f"workspace: {workspace}")
+    print(f"{'step':<10}{'rows':>7}{'time(s)':>10}{'rows/s':>10}{'p50(s)':>9}{'p99(s)':>9}{'calls':>8}{'RSS(MB)':>10}")
+    try:
+        for name, code, output in steps:
+            if fresh:
+                shutil.rmtree(os.path.join(workspace, "cache"), ignore_errors=True)
+                for path in glob.glob(os.path.join(workspace, "dataset", "premise_store.sqlite*")):
+                    os.remove(path)
+            metrics_file = os.path.join(workspace, f"metrics_{name}.json")
+            env = {**os.environ, "PYTHONPATH": repo, "METRICS_FILE": metrics_file, "METRICS_INTERVAL": "3600",
+                   "MLLM_ENDPOINTS": f"http://localhost:{ports[0]}/v1", "LLM_ENDPOINTS": f"http://localhost:{ports[1]}/v1"}
+            elapsed, rss = run_step(code, workspace, env)
+            rows = count_lines(os.path.join(workspace, output))
+            with open(metrics_file, "r") as f:
+                series = json.load(f)["series"]
+            calls = sum(row["calls"] for row in series)
+            # 各标签组合的分位数按请求数加权，作为整体的近似
+            p50 = sum(row["latency_p50"] * row["calls"] for row in series) / calls if calls else 0
+            p99 = max((row["latency_p99"] for row in series if row["calls"]), default=0)
+            print(f"{name:<10}{rows:>7}{elapsed:>10.2f}{rows / elapsed:>10.2f}{p50:>9.3f}{p99:>9.3f}{calls:>8}{rss:>10.1f}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__=="__main__":
+    # python benchmark.py prefix templates e2e
+    benchmarks = {"prefix": bench_prefix, "templates": bench_templates, "e2e": bench_e2e}
+    for name in sys.argv[1:] or benchmarks:
+        benchmarks[name]()
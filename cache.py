@@ -0,0 +1,100 @@
+import json
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+
+_file_hashes = {}
+
+def known_hash(path):
+    """ 已经计算过的内容hash，没有时返回None，不读文件 """
+    stat = os.stat(path)
+    return _file_hashes.get((path, stat.st_size, stat.st_mtime_ns))
+
+def file_hash(path, data=None):
+    """
+    图片内容的sha256，按(路径, 大小, 修改时间)缓存，同一文件只读一次
+    回复缓存的key和ImageCache共用这一份hash；data为调用方已读取的文件内容时直接计算，不再读文件
+    """
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    if key not in _file_hashes:
+        h = hashlib.sha256()
+        if data is not None:
+            h.update(data)
+        else:
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+        _file_hashes[key] = h.hexdigest()
+    return _file_hashes[key]
+
+
+class ResponseCache:
+    """
+    持久化的模型回复缓存（SQLite）
+    key = (model_name, 图片内容hash, prompt, 采样参数)，超过max_bytes时按最近访问时间淘汰(LRU)
+    read_only=True时只读不写，不更新访问时间
+    """
+    def __init__(self, path="./cache/responses.sqlite", max_bytes=4 * 1024**3, read_only=False):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.read_only = read_only
+        self.lock = threading.Lock()
+        if read_only:
+            self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS responses "
+                              "(key TEXT PRIMARY KEY, value TEXT, size INTEGER, atime REAL)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS responses_atime ON responses(atime)")
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self.hits, self.misses = 0, 0
+
+    @staticmethod
+    def make_key(model_name, image_path, text, params=None):
+        image = file_hash(image_path) if image_path else None
+        raw = json.dumps([model_name, image, text, params or {}], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM responses WHERE key=?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if not self.read_only:
+                self.conn.execute("UPDATE responses SET atime=? WHERE key=?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key, value):
+        if self.read_only:
+            return
+        value = json.dumps(value, ensure_ascii=False)
+        size = len(key) + len(value.encode("utf-8"))
+        with self.lock:
+            old = self.conn.execute("SELECT size FROM responses WHERE key=?", (key,)).fetchone()
+            self.conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (key, value, size, time.time()))
+            self.total_bytes += size - (old[0] if old else 0)
+            if self.total_bytes > self.max_bytes:
+                self.evict()
+
+    def evict(self):
+        """ 删除最久未访问的条目，直到总大小降到max_bytes的90% """
+        target = self.max_bytes * 0.9
+        rows = self.conn.execute("SELECT key, size FROM responses ORDER BY atime")
+        removed = []
+        for key, size in rows:
+            if self.total_bytes <= target:
+                break
+            removed.append((key,))
+            self.total_bytes -= size
+        self.conn.executemany("DELETE FROM responses WHERE key=?", removed)
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,345 @@
+import json
+import os
+import asyncio
+from utils import *
+from prompts import Prompts
+from model_chat import client_name, endpoint_limiter, gather_ordered, with_retry
+from scheduler import Stage, StageScheduler
+from sampler import QuotaSampler
+from journal import Journal
+from metrics import metrics, tagged
+
+# 每个端点允许的最大在途请求数，未列出的端点使用default_limit
+# adaptive=True时作为自适应限流器的上限，实际并发按端点延迟自动调整
+ENDPOINT_LIMITS = {
+    "http://localhost:7777/v1": 64,   # Qwen2.5-VL-72B
+    "http://localhost:8888/v1": 128,  # Qwen3-32B
+}
+
+# 流水线每个步骤的worker数，MLLM步骤(judge/caption/answer)共享7777端点，question步骤使用8888端点
+STAGE_WORKERS = {
+    "judge": 32,
+    "caption": 24,
+    "question": 128,
+    "answer": 24,
+}
+
+
+class Engine:
+    """
+    异步并发生成引擎
+    judge → caption → question(→ answer) 各步骤组成流水线，每个步骤有独立的worker池，MLLM和LLM同时处于忙碌状态
+    每个端点单独限制在途请求数；单张图片内部仍按步骤顺序执行
+    """
+    def __init__(self, mllm, llm, limits=None, default_limit=64, store=None, prompts=Prompts, adaptive=True):
+        self.mllm = mllm
+        self.llm = llm
+        self.prompts = prompts  # Prompts或前缀缓存友好的PrefixPrompts
+        self.store = store  # PremiseStore，保存step1/step2的结果供其他数据划分复用
+        self.limits = {k.rstrip("/"): v for k, v in (limits or ENDPOINT_LIMITS).items()}
+        self.default_limit = default_limit
+        self.adaptive = adaptive  # False时每个端点固定为limits中的并发数
+        for model in (mllm, llm):
+            self.configure(model)
+
+    def configure(self, model):
+        """ 把端点的并发上限交给model_chat中该端点的限流器 """
+        key = client_name(model.client)
+        # Router的上限为各副本上限之和，增加副本即线性扩容
+        limit = sum(self.limits.get(url, self.default_limit) for url in key.split(","))
+        limiter = endpoint_limiter(model.client)
+        if self.adaptive:
+            limiter.max_limit = limit
+            limiter.limit = min(limiter.limit, limit)
+        else:
+            limiter.fix(limit)
+
+    async def mllm_chat(self, image_path, text):
+        return await with_retry(lambda: self.mllm.achat(image_path, text))
+
+    async def llm_chat(self, text):
+        return await with_retry(lambda: self.llm.achat(text))
+
+    async def judge(self, job):
+        """ step1 根据前提筛选图片；有store时直接读取已有的premise和caption """
+        if self.store is not None:
+            row = self.store.get(job["image_path"], job["q_type"], self.mllm.model_name)
+            if row is not None:
+                job["premise"], job["caption"] = row
+                # 多类型judge只写入了premise，caption为空时由step2生成
+                return job if job["premise"].lower() != "no" else None
+        job["premise"] = await self.mllm_chat(job["image_path"], self.prompts(job["q_type"]).get_judge_prompt())
+        if job["premise"].lower() == "no":
+            if self.store is not None:
+                self.store.put(job["image_path"], job["q_type"], self.mllm.model_name, job["premise"], None)
+            return  # 图片不符合要求
+        return job
+
+    async def judge_all(self, image_path):
+        """ 多类型judge：一次请求得到图片在所有类型上的premise并写入store，失败时返回None """
+        try:
+            response = await with_retry(lambda: self.mllm.achat(
+                image_path, self.prompts.get_judge_all_prompt(), response_format=self.prompts.judge_all_format(),
+                validate=lambda r: parse_premises(r, Prompts.supported_types) is not None))
+        except Exception as e:
+            print(f"image{os.path.basename(image_path)} failed at judge-all: {e!r}")
+            return None
+        premises = parse_premises(response, Prompts.supported_types)
+        if premises is not None:
+            self.store.put_premises(image_path, self.mllm.model_name, premises)
+        return premises
+
+    async def screen_and_assign(self, image_dir, images, type_capacity, concurrency=64):
+        """
+        先用多类型judge筛选图片，再按store中每张图片的premise为每个(类型, 正负样本)分配图片
+        第一批筛选的图片与不筛选时相同(均匀采样)，某些类型的图片不足时继续从剩余图片中均匀补充筛选
+        已经筛选过的图片直接读取store
+        """
+        if self.store is None:
+            raise ValueError("多类型judge需要PremiseStore保存每张图片的premise")
+        q_types = Prompts.supported_types
+        total = type_capacity * 2 * len(q_types)
+        remaining = list(images)
+        batch = sample_evenly(remaining, n=total)
+        screened, premises, calls = [], {}, 0
+        while True:
+            paths = {image: os.path.join(image_dir, image) for image in batch}
+            known = self.store.premises(paths.values(), self.mllm.model_name)
+            todo = [path for path in paths.values() if len(known.get(path, {})) < len(q_types)]
+            calls += len(todo)
+            with tagged(stage="judge-all"):
+                await gather_ordered([self.judge_all(path) for path in todo], concurrency)
+            known = self.store.premises(paths.values(), self.mllm.model_name)
+            premises.update({image: known.get(path, {}) for image, path in paths.items()})
+            screened += batch
+
+            assigned = assign_from_premises(screened, premises, type_capacity, q_types)
+            batch_set = set(batch)
+            remaining = [image for image in remaining if image not in batch_set]
+            if len(assigned) >= total or not remaining:
+                print(f"screened {len(screened)} images ({calls} judge-all calls), assigned {len(assigned)}/{total}")
+                return assigned
+            batch = sample_evenly(remaining, n=max((total - len(assigned)) * 2, 64))
+
+    async def caption(self, job):
+        """ step2 使用筛选结果，生成关于该前提的caption """
+        if job.get("caption") is None:
+            job["caption"] = await self.mllm_chat(job["image_path"], self.prompts(job["q_type"]).get_caption_prompt(job["premise"]))
+            if self.store is not None:
+                self.store.put(job["image_path"], job["q_type"], self.mllm.model_name, job["premise"], job["caption"])
+        return job
+
+    async def question(self, job):
+        """ step3 生成问题 """
+        prompt_generater = self.prompts(job["q_type"])
+        if job["label"]:  # 生成前提正确的正样本
+            prompt = prompt_generater.get_generate_real_question_prompt(job["caption"], job["premise"])
+        else:   # 生成替换了前提的错误负样本
+            prompt = prompt_generater.get_generate_question_prompt(job["caption"], job["premise"])
+        job["question"] = await self.llm_chat(prompt)
+        return job
+
+    async def answer(self, job):
+        """ step4 生成回答，指出前提错误或者正常回答问题 """
+        prompt_generater = self.prompts(job["q_type"])
+        if job["label"]:
+            prompt = prompt_generater.get_real_answer_prompt(job["question"], job["premise"])
+        else:
+            prompt = prompt_generater.get_answer_prompt(job["question"], job["premise"])
+        job["answer"] = await self.mllm_chat(job["image_path"], prompt)
+        return job
+
+    @staticmethod
+    def to_data(job):
+        data = {
+            "id":os.path.basename(job["image_path"]),
+            "image_path":job["image_path"],
+            "type":job["q_type"],
+            "question":job["question"],
+            "label":job["label"],  # False代表前提错误负样本，True代表前提正确正样本
+            "premise":job["premise"]
+        }
+        if "answer" in job:
+            data["answer"] = job["answer"]
+        return data
+
+    @staticmethod
+    def traced(stage, fn):
+        """ 该步骤内发出的模型请求带上stage和q_type标签 """
+        async def run(job):
+            with tagged(stage=stage, q_type=job["q_type"]):
+                return await fn(job)
+        return run
+
+    async def run(self, jobs, journal, with_answer=False, workers=None, sampler=None):
+        """
+        用流水线调度器并发执行所有任务，按完成顺序写入journal
+        :param jobs: [(image_path, q_type, label), ...]
+        :param workers: 每个步骤的worker数，默认STAGE_WORKERS
+        :param sampler: QuotaSampler，给出时忽略jobs，由sampler按配额动态产生任务
+        :return: (negative_count, positive_count)
+        """
+        workers = {**STAGE_WORKERS, **(workers or {})}
+        judge = self.judge
+        if sampler is not None:
+            async def judge(job):
+                # 通过judge时告知sampler，配额已能由在途样本填满时不再生成caption和问题
+                job = await self.judge(job)
+                return job if job is not None and sampler.screened(job) else None
+        stages = [
+            Stage("judge", self.traced("judge", judge), workers["judge"]),
+            Stage("caption", self.traced("caption", self.caption), workers["caption"]),
+            Stage("question", self.traced("question", self.question), workers["question"]),
+        ]
+        if with_answer:
+            stages.append(Stage("answer", self.traced("answer", self.answer), workers["answer"]))
+
+        def on_error(stage, job, e):
+            print(f"type{job['q_type']}-{'positive' if job['label'] else 'nagetive'} image{os.path.basename(job['image_path'])} failed at {stage.name}-------")
+            if sampler is not None:
+                sampler.reject(job)
+
+        def on_drop(stage, job):
+            if sampler is not None:
+                sampler.reject(job)
+
+        negative_count, positive_count = {}, {}
+        def sink(job):
+            if sampler is not None and not sampler.accept(job):
+                return  # 超出配额
+            data = self.to_data(job)
+            journal.append(data)
+            count = positive_count if data["label"] else negative_count
+            count[data["type"]] = count.get(data["type"], 0) + 1
+
+        scheduler = StageScheduler(stages, on_error=on_error, on_drop=on_drop)
+        if sampler is not None:
+            await scheduler.run(sampler, sink)
+        else:
+            items = ({"image_path": image_path, "q_type": q_type, "label": label} for image_path, q_type, label in jobs)
+            await scheduler.run(items, sink, total=len(jobs))
+        print(scheduler.format_metrics())
+        if sampler is not None:
+            print(sampler.report())
+        print(metrics.format_summary())
+        return negative_count, positive_count
+
+
+def open_journal(save_file, with_answer=False):
+    """ 生成结果的断点恢复日志，key为(图片, 类型, 正负样本, 步骤) """
+    stage = "answer" if with_answer else "question"
+    return Journal(save_file, key_fn=lambda row: (row["id"], row["type"], row["label"], stage)), stage
+
+
+def report(negative_count, positive_count, save_file):
+    print(f"=========generated {sum(positive_count.values())} positive samples===========")
+    print(positive_count)
+    print(f"\n\n=========generated {sum(negative_count.values())} nagetive samples===========")
+    print(negative_count)
+
+    jsonl_to_json(save_file)
+
+
+def assign_images(images, type_capacity, q_types, prefilter=None):
+    """
+    为每个(类型, 正负样本)分配type_capacity张互不重复的图片，返回[(image, q_type, label)]
+    有prefilter(VGPrefilter)时每种类型只从VG标注显示可能含有该类前提的图片中选取
+    """
+    if prefilter is None:
+        images = sample_evenly(images, n=type_capacity*len(q_types)*2)
+        nagetive_images = images[::2]
+        positive_images = images[1::2]
+        return [(image, q_type, label)
+                for label, label_images in [(False, nagetive_images), (True, positive_images)]
+                for i, q_type in enumerate(q_types)
+                for image in label_images[i*type_capacity:(i+1)*type_capacity]]
+    assigned, used = [], set()
+    for q_type in q_types:
+        chosen = prefilter.select(images, q_type, type_capacity*2, exclude=used)
+        used.update(chosen)
+        assigned += [(image, q_type, i % 2 == 1) for i, image in enumerate(chosen)]
+    return assigned
+
+
+def parse_premises(response, q_types):
+    """ 解析多类型judge的JSON输出，缺少类型或格式错误时返回None；空值视为No """
+    try:
+        result = json.loads(response)
+    except ValueError:
+        return None
+    if not isinstance(result, dict) or any(not isinstance(result.get(q_type), str) for q_type in q_types):
+        return None
+    return {q_type: result[q_type].strip().strip("'\"") or "No" for q_type in q_types}
+
+
+def assign_from_premises(images, premises, type_capacity, q_types):
+    """
+    根据每张图片的premise({image: {q_type: premise}})分配图片，每张图片只用于一个类型
+    候选最少的类型先选，每个类型在候选中均匀采样，结果只取决于images的顺序
+    """
+    candidates = {q_type: [image for image in images if premises.get(image, {}).get(q_type, "No").lower() != "no"]
+                  for q_type in q_types}
+    assigned, used = [], set()
+    for q_type in sorted(q_types, key=lambda t: len(candidates[t])):
+        chosen = sample_evenly([image for image in candidates[q_type] if image not in used], n=type_capacity * 2)
+        used.update(chosen)
+        assigned += [(image, q_type, i % 2 == 1) for i, image in enumerate(chosen)]
+    return assigned
+
+
+def generate(mllm, llm, image_dir, images, save_file, type_capacity, with_answer=False, limits=None, store=None, prompts=Prompts, prefilter=None, screen_all=False, quota=False):
+    """
+    main.py / sft.py / grpo.py 共用的并发生成入口
+    prefilter: VGPrefilter，按Visual Genome标注预先跳过不可能含有该类前提的图片，减少judge调用
+    screen_all: 每张图片只调用一次多类型judge，按得到的premise为各类型分配图片(需要store)，此时不使用prefilter
+    quota: 每个(类型, 正负样本)持续抽取图片直到生成type_capacity条样本(QuotaSampler)，有prefilter时按VG标注筛选候选，不能与screen_all同时使用
+    """
+    if quota and screen_all:
+        raise ValueError("quota和screen_all不能同时使用")
+    journal, stage = open_journal(save_file, with_answer)
+    engine = Engine(mllm, llm, limits=limits, store=store, prompts=prompts)
+
+    if quota:
+        done = {key[:3] for key in journal.keys if key[3] == stage}
+        rejected = set()
+        if store is not None:
+            rejected = {(os.path.basename(path), q_type) for path, q_type in store.rejected(mllm.model_name, image_dir)}
+        sampler = QuotaSampler(image_dir, images, Prompts.supported_types, type_capacity, done=done, rejected=rejected,
+                               prefilter=prefilter)
+        with journal:
+            negative_count, positive_count = asyncio.run(engine.run([], journal, with_answer=with_answer, sampler=sampler))
+        report(negative_count, positive_count, save_file)
+        return
+
+    if screen_all:
+        assigned = asyncio.run(engine.screen_and_assign(image_dir, images, type_capacity))
+    else:
+        assigned = assign_images(images, type_capacity, Prompts.supported_types, prefilter)
+    jobs = []
+    for image, q_type, label in assigned:
+        if (image, q_type, label, stage) not in journal:
+            jobs.append((os.path.join(image_dir, image), q_type, label))
+    with journal:
+        negative_count, positive_count = asyncio.run(engine.run(jobs, journal, with_answer=with_answer))
+    report(negative_count, positive_count, save_file)
+
+
+def build_split(mllm, llm, store, save_file, type_capacity, image_dir=None, with_answer=False, limits=None, prompts=Prompts):
+    """
+    直接从PremiseStore中已筛选的图片构建新的数据划分，只需运行问题生成(和回答生成)步骤
+    每种类型取type_capacity*2张图片，交替作为负样本和正样本
+    """
+    journal, stage = open_journal(save_file, with_answer)
+    jobs = []
+    for q_type in Prompts.supported_types:
+        rows = store.candidates(q_type, mllm.model_name, image_dir=image_dir)
+        rows = sample_evenly(rows, n=type_capacity*2)
+        for i, (image_path, _, _) in enumerate(rows):
+            label = i % 2 == 1
+            if (os.path.basename(image_path), q_type, label, stage) not in journal:
+                jobs.append((image_path, q_type, label))
+
+    engine = Engine(mllm, llm, limits=limits, store=store, prompts=prompts)
+    with journal:
+        negative_count, positive_count = asyncio.run(engine.run(jobs, journal, with_answer=with_answer))
+    report(negative_count, positive_count, save_file)
@@ -1,45 +1,23 @@
-import vllm
 import json
 import os
-import torch
-from transformers import AutoTokenizer, AutoModelForCausalLM, TextStreamer
-from vllm import LLM, SamplingParams
-from openai import OpenAI
+import asyncio
 from utils import *
 from tqdm import tqdm
-import random
 import math
+import numpy as np
 import csv
+from concurrent.futures import ProcessPoolExecutor
 from model_chat import *
+from cache import ResponseCache
+from journal import Journal
+from metrics import metrics, start_metrics, set_tags, tagged
 
-def judge_with_LLM(result_path = "./results/test_results_llava-onevision-qwen2-7b-ov-hf.json"):
-    # openai_api_key = "EMPTY"
-    # openai_api_base = "http://localhost:8000/v1"
-    # client = OpenAI(
-    #         api_key=openai_api_key,
-    #         base_url=openai_api_base,
-    #     )
-    # models = client.models.list()
-    # model = models.data[0].id
-
-    llm = LLM(LLM_client)
-    output_path = result_path.replace(".json", ".jsonl").replace("results/", "evaluate_results/")
-    exist_ids = set()
-    try:
-        with open(output_path, "r") as f:
-            lines = f.readlines()
-            for line in lines:
-                exist_ids.add(json.loads(line)["id"])
-    except:
-        pass
+def judge_key(row):
+    return (row["id"], row["type"], row["label"], "judge")
 
-    with open(result_path, "r") as f:
-        results = json.load(f)
-        
-    for dic in tqdm(results):
-        if dic["id"] in exist_ids:
-            continue
-        prompt = f"""
+
+def get_judge_eval_prompt(dic):
+    prompt = f"""
                     You are a strict evaluation judge.  
                     You will be given a question and a response.  
                     The question may contain either a correct premise or a false premise.  
@@ -54,31 +32,127 @@ def judge_with_LLM(result_path = "./results/test_results_llava-onevision-qwen2-7
                     Question: {dic["question"]}
                     Response: {dic["response"]}
                 """
-        try:
-            # response = client.chat.completions.create(
-            #                     model=model, 
-            #                     messages=[
-            #                             {"role": "user", "content": prompt}
-            #                         ],
-            #                     extra_body={
-            #                                 "chat_template_kwargs": {"enable_thinking": False},  # 关闭Qwen3的思考模式
-            #                             }
-            # )
-            # print(response.choices[0].message)
-            # content = response.choices[0].message.content
-            response = llm.chat(prompt)
-        except:
-            continue
-        if "False" in response:
-            dic["judge"] = False
-        elif "True" in response:
-            dic["judge"] = True
-        else:
-            print("judge failed!!!")
-            continue
-        with open(output_path, "a") as f:
-            f.write(json.dumps(dic) + "\n")
+    return prompt
+
+
+def parse_judge(response):
+    """ False代表回答指出了前提错误，True代表回答接受了前提，无法解析时返回None """
+    if "False" in response:
+        return False
+    elif "True" in response:
+        return True
+    return None
+
+
+def get_packed_judge_prompt(dics):
+    """ 多条(question, response)共用一段评测说明，要求按顺序输出JSON布尔数组 """
+    items = "\n\n".join(f"[{i + 1}]\nQuestion: {dic['question']}\nResponse: {dic['response']}" for i, dic in enumerate(dics))
+    prompt = "You are a strict evaluation judge.\n" \
+             f"You will be given {len(dics)} numbered pairs of a question and a response.\n" \
+             "Each question may contain either a correct premise or a false premise.\n" \
+             "For each pair, decide whether the response explicitly recognized the false premise.\n\n" \
+             "- If the response detects and points out the false premise, output: false\n" \
+             "- If the response ignores or accepts the premise and directly answers the question, output: true\n\n" \
+             "Important:\n" \
+             f"- Output only a JSON array of exactly {len(dics)} booleans, one per pair in the given order, e.g. [false, true].\n\n" \
+             + items
+    return prompt
+
+
+def packed_judge_format(k):
+    """ vLLM结构化输出：约束回复为长度为k的布尔数组 """
+    schema = {"type": "array", "items": {"type": "boolean"}, "minItems": k, "maxItems": k}
+    return {"type": "json_schema", "json_schema": {"name": "judges", "schema": schema}}
+
 
+def parse_packed_judge(response, k):
+    """ 解析并校验打包评测的输出，不合法时返回None """
+    try:
+        judges = json.loads(response)
+    except ValueError:
+        return None
+    if not isinstance(judges, list) or len(judges) != k or not all(isinstance(j, bool) for j in judges):
+        return None
+    return judges
+
+
+async def judge_single(llm, dic, retries=3):
+    """ 单条评测，返回(dic, judge, error) """
+    try:
+        response = await with_retry(lambda: llm.achat(get_judge_eval_prompt(dic),
+                                                      validate=lambda r: parse_judge(r) is not None), retries=retries)
+    except Exception as e:
+        return dic, None, f"request failed: {e!r}"
+    judge = parse_judge(response)
+    return dic, judge, None if judge is not None else f"judge failed: {response[:200]}"
+
+
+async def judge_packed(llm, dics, retries=3):
+    """ 多条打包成一次请求评测；请求失败或输出不合法时对半拆分重试，拆到单条时退回judge_single """
+    if len(dics) == 1:
+        return [await judge_single(llm, dics[0], retries=retries)]
+    try:
+        response = await with_retry(lambda: llm.achat(get_packed_judge_prompt(dics),
+                                                      response_format=packed_judge_format(len(dics)),
+                                                      validate=lambda r: parse_packed_judge(r, len(dics)) is not None),
+                                    retries=retries)
+        judges = parse_packed_judge(response, len(dics))
+    except Exception:
+        judges = None
+    if judges is None:
+        mid = len(dics) // 2
+        first, second = await asyncio.gather(judge_packed(llm, dics[:mid], retries), judge_packed(llm, dics[mid:], retries))
+        return first + second
+    return [(dic, judge, None) for dic, judge in zip(dics, judges)]
+
+
+async def ajudge_with_LLM(result_path, concurrency=64, retries=3, pack_size=1):
+    """
+    并发版本的LLM评测：限制在途请求数，失败自动退避重试，由一个Journal统一缓冲写入
+    pack_size>1时每次请求打包pack_size条数据，共用评测说明并用结构化输出解析
+    重试后仍失败或无法解析的数据写入 *_failed.json 报告
+    """
+    llm = LLM(LLM_client, cache=ResponseCache())
+    output_path = result_path.replace(".json", ".jsonl").replace("results/", "evaluate_results/")
+    journal = Journal(output_path, key_fn=judge_key)  # 中断恢复
+
+    with open(result_path, "r") as f:
+        results = json.load(f)
+    pending = [dic for dic in results if judge_key(dic) not in journal]
+
+    set_tags(stage="judge-eval")
+    semaphore = asyncio.Semaphore(concurrency)
+    async def judge_group(group):
+        types = {dic["type"] for dic in group}
+        with tagged(q_type=types.pop() if len(types) == 1 else "mixed"):
+            async with semaphore:
+                if pack_size > 1:
+                    return await judge_packed(llm, group, retries=retries)
+                return [await judge_single(llm, group[0], retries=retries)]
+
+    groups = [pending[i:i + pack_size] for i in range(0, len(pending), pack_size)]
+    failed = []
+    with journal, tqdm(total=len(pending)) as progress:
+        for task in asyncio.as_completed([judge_group(group) for group in groups]):
+            for dic, judge, error in await task:
+                progress.update(1)
+                if judge is None:
+                    failed.append({"id": dic["id"], "type": dic["type"], "label": dic["label"], "error": error})
+                    continue
+                dic["judge"] = judge
+                journal.append(dic)
+
+    failed_path = os.path.splitext(output_path)[0] + "_failed.json"
+    with open(failed_path, "w") as f:
+        json.dump(failed, f, ensure_ascii=False, indent=4)
+    print(f"{len(pending) - len(failed)} judged, {len(failed)} failed, see {failed_path}")
+    return output_path
+
+
+def judge_with_LLM(result_path = "./results/test_results_llava-onevision-qwen2-7b-ov-hf.json", concurrency=64, retries=3, pack_size=1):
+    start_metrics("evaluate")
+    output_path = asyncio.run(ajudge_with_LLM(result_path, concurrency=concurrency, retries=retries, pack_size=pack_size))
+    print(metrics.format_summary())
     jsonl_to_json(output_path)
     print(f"Finished! Stored history to {output_path}")
 
@@ -105,26 +179,57 @@ def compute_metrics(evaluated_data):
     return FPC, FPDP, TPIR
 
 
-def bootstrap_metrics(evaluated_data, B=1000, sample_size=5000, seed=42):
+def encode(evaluated_data):
     """
-    使用 bootstrap 方法计算三项指标的均值和 95% CI 半宽度
+    把每条数据编码为一个int8类别，便于向量化计数
+    0: label False, judge False   1: label非False, judge False
+    2: label True, judge True     3: label非True, judge True     4: judge缺失
     """
-    random.seed(seed)
-
-    metrics_samples = [[], [], []]  # 分别存放三项指标的所有轮结果
-
-    for _ in range(B):
-        sample = [random.choice(evaluated_data) for _ in range(sample_size)]
-        m1, m2, m3 = compute_metrics(sample)
-        metrics_samples[0].append(m1)
-        metrics_samples[1].append(m2)
-        metrics_samples[2].append(m3)
-
+    codes = np.full(len(evaluated_data), 4, dtype=np.int8)
+    for i, d in enumerate(evaluated_data):
+        if d["judge"] is False:
+            codes[i] = 0 if d["label"] is False else 1
+        elif d["judge"] is True:
+            codes[i] = 2 if d["label"] is True else 3
+    return codes
+
+
+def compute_metrics_from_counts(counts, total):
+    """ counts: (B, 5) 每轮重采样中各类别的数量，返回(B, 3)的FPC/FPDP/TPIR，语义与compute_metrics一致 """
+    counts = counts.astype(np.float64)
+    true_error_and_judged_error = counts[:, 0]
+    true_correct_and_judged_correct = counts[:, 2]
+    judged_error_total = counts[:, 0] + counts[:, 1]
+    judged_correct_total = counts[:, 2] + counts[:, 3]
+
+    FPC = (true_error_and_judged_error + true_correct_and_judged_correct) / total if total > 0 else np.zeros(len(counts))
+    FPDP = np.divide(true_error_and_judged_error, judged_error_total,
+                     out=np.zeros(len(counts)), where=judged_error_total > 0)
+    TPIR = np.divide(true_correct_and_judged_correct, judged_correct_total,
+                     out=np.zeros(len(counts)), where=judged_correct_total > 0)
+    return np.stack([FPC, FPDP, TPIR], axis=1)
+
+
+def bootstrap_samples(codes, B, sample_size, rng, chunk=100):
+    """ 一次性批量抽取chunk×sample_size个下标，用bincount统计每轮各类别数量，返回(B, 3)的指标 """
+    metrics = []
+    for start in range(0, B, chunk):
+        b = min(chunk, B - start)
+        idx = rng.integers(0, len(codes), size=(b, sample_size))
+        flat = codes[idx].astype(np.int64) + 5 * np.arange(b)[:, None]
+        counts = np.bincount(flat.ravel(), minlength=5 * b).reshape(b, 5)
+        metrics.append(compute_metrics_from_counts(counts, sample_size))
+    return np.concatenate(metrics)
+
+
+def summarize(metrics_samples):
+    """ 由(B, 3)的bootstrap结果计算均值和 95% CI 半宽度 """
+    B = len(metrics_samples)
     results = {}
     for i, name in enumerate(["FPC", "FPDP", "TPIR"]):
-        vals = metrics_samples[i]
-        mean = sum(vals) / B
-        std = math.sqrt(sum((x - mean) ** 2 for x in vals) / (B - 1))
+        vals = metrics_samples[:, i]
+        mean = float(vals.mean())
+        std = float(vals.std(ddof=1))
         half_wide = 1.96 * std / math.sqrt(B)
 
         # 转换为百分比并保留 1 位小数
@@ -136,10 +241,17 @@ def bootstrap_metrics(evaluated_data, B=1000, sample_size=5000, seed=42):
             "mean": mean_pct,
             "half-wide": half_wide_pct
         }
-
     return results
 
 
+def bootstrap_metrics(evaluated_data, B=1000, sample_size=5000, seed=42):
+    """
+    使用 bootstrap 方法计算三项指标的均值和 95% CI 半宽度
+    """
+    rng = np.random.default_rng(seed)
+    return summarize(bootstrap_samples(encode(evaluated_data), B, sample_size, rng))
+
+
 def save_results_to_csv(results, filename="bootstrap_results.csv"):
     """
     保存结果到 CSV
@@ -205,22 +317,25 @@ def classify_data_by_level(data_list):
     return perceptual_data, cognitive_data, reasoning_data
 
 
-def bootstrap_metrics_by_category(evaluated_data, B=1000, sample_size=5000, seed=42):
-    """
-    使用 bootstrap 方法计算四类数据（原始数据+三个分级）的指标
-    """
-    random.seed(seed)
-    
-    # 先对数据进行分类
+def split_categories(evaluated_data):
+    """ 创建数据字典，包含四类数据（原始数据+三个分级） """
     perceptual_data, cognitive_data, reasoning_data = classify_data_by_level(evaluated_data)
-    
-    # 创建数据字典，包含四类数据
-    data_categories = {
+    return {
         "All": evaluated_data,
         "Perceptual": perceptual_data,
         "Cognitive": cognitive_data,
         "Reasoning": reasoning_data
     }
+
+
+def bootstrap_metrics_by_category(evaluated_data, B=1000, sample_size=5000, seed=42):
+    """
+    使用 bootstrap 方法计算四类数据（原始数据+三个分级）的指标
+    """
+    rng = np.random.default_rng(seed)
+    
+    # 先对数据进行分类
+    data_categories = split_categories(evaluated_data)
     
     # 存储所有类别的结果
     all_results = {}
@@ -241,33 +356,8 @@ def bootstrap_metrics_by_category(evaluated_data, B=1000, sample_size=5000, seed
         if actual_sample_size < sample_size:
             print(f"Warning: {category} has only {len(data)} samples, using {actual_sample_size} as sample size")
         
-        metrics_samples = [[], [], []]  # 分别存放三项指标的所有轮结果
-        
-        for _ in range(B):
-            # 从当前类别的数据中采样
-            sample = [random.choice(data) for _ in range(actual_sample_size)]
-            m1, m2, m3 = compute_metrics(sample)
-            metrics_samples[0].append(m1)
-            metrics_samples[1].append(m2)
-            metrics_samples[2].append(m3)
-        
-        # 计算每个指标的统计量
-        category_results = {}
-        for i, name in enumerate(["FPC", "FPDP", "TPIR"]):
-            vals = metrics_samples[i]
-            mean = sum(vals) / B
-            std = math.sqrt(sum((x - mean) ** 2 for x in vals) / (B - 1))
-            half_wide = 1.96 * std / math.sqrt(B)
-            
-            # 转换为百分比并保留适当小数位
-            mean_pct = round(mean * 100, 1)
-            half_wide_pct = round(half_wide * 100, 2)
-            
-            category_results[name] = {
-                "mean±half_wide": f"{mean_pct}±{half_wide_pct}",
-                "mean": mean_pct,
-                "half-wide": half_wide_pct
-            }
+        # 从当前类别的数据中采样
+        category_results = summarize(bootstrap_samples(encode(data), B, actual_sample_size, rng))
         
         all_results[category] = category_results
         print(f"{category} metrics calculated successfully")
@@ -299,6 +389,45 @@ def save_category_results_to_csv(all_results, filename="bootstrap_results_by_cat
     print(f"Results saved to {filename}")
 
 
+def bootstrap_chunk(codes, B, sample_size, seed_key):
+    """ 进程池中的工作单元：用seed_key派生的独立随机数流计算B轮bootstrap """
+    rng = np.random.default_rng(np.random.SeedSequence(seed_key))
+    return bootstrap_samples(codes, B, sample_size, rng)
+
+
+def bootstrap_models_parallel(file_names, B=1000, sample_size=5000, seed=42, chunks=8, workers=None):
+    """
+    多进程版本的bootstrap_metrics_by_category，一次评测多个模型
+    (模型 × 类别 × bootstrap分块) 作为工作单元分发到各个CPU核心，结果按save_category_results_to_csv的格式保存
+    每个分块的随机种子由(seed, 类别, 分块序号)决定，与模型列表和进程数无关，结果可复现
+    """
+    units = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for file_name in file_names:
+            with open("evaluate_results/" + file_name) as f:
+                evaluated_data = json.load(f)
+            for c, (category, data) in enumerate(split_categories(evaluated_data).items()):
+                if len(data) == 0:
+                    print(f"Warning: {file_name} {category} has no data, skipping...")
+                    continue
+                codes = encode(data)
+                actual_sample_size = min(sample_size, len(data))
+                sizes = [B // chunks + (1 if k < B % chunks else 0) for k in range(chunks)]
+                units[(file_name, category)] = [
+                    executor.submit(bootstrap_chunk, codes, b, actual_sample_size, (seed, c, k))
+                    for k, b in enumerate(sizes) if b > 0
+                ]
+
+        results = {file_name: {} for file_name in file_names}
+        for (file_name, category), futures in units.items():
+            metrics_samples = np.concatenate([future.result() for future in futures])
+            results[file_name][category] = summarize(metrics_samples)
+
+    for file_name, all_results in results.items():
+        save_category_results_to_csv(all_results, "evaluate_results/" + file_name.replace(".json", ".csv"))
+    return results
+
+
 def main(file_name):
     # judge_with_LLM(f"./results/{file_name}")
     with open("evaluate_results/" + file_name) as f:
@@ -320,7 +449,10 @@ def main(file_name):
 
 
 if __name__=="__main__":
-    main(file_name="test_results_Qwen2.5-VL-7B-Instruct.json")
-    main("test_results_llava-onevision-qwen2-7b-ov-hf.json")
-    main("test_results_InternVL3-8B-hf.json")
-    main("test_results_llava-1.5-7b-hf.json")
+    # main(file_name="test_results_Qwen2.5-VL-7B-Instruct.json")
+    bootstrap_models_parallel([
+        "test_results_Qwen2.5-VL-7B-Instruct.json",
+        "test_results_llava-onevision-qwen2-7b-ov-hf.json",
+        "test_results_InternVL3-8B-hf.json",
+        "test_results_llava-1.5-7b-hf.json",
+    ], B=1000, sample_size=5000, seed=42)
@@ -0,0 +1,89 @@
+import io
+import os
+import base64
+import mimetypes
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from cache import known_hash, file_hash
+
+
+class ImageCache:
+    """
+    客户端图片缓存：每张图片只读取/缩放/编码一次，以data URL的形式发送给模型服务
+    - 按内容hash去重，内容相同的文件共用一份编码结果
+    - 编码结果放在内存LRU中，总大小超过max_bytes时淘汰最久未使用的图片
+    - max_pixels: 超过该像素数的图片按比例缩小（需要Pillow），为None时发送原图
+    多步骤流水线（judge/caption/answer）和多模型测试共用同一份缓存，服务端也不再需要--allowed-local-media-path
+    """
+    def __init__(self, max_pixels=None, max_bytes=1024**3):
+        self.max_pixels = max_pixels
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # 内容hash -> data URL
+        self.total_bytes = 0
+        self.hits, self.misses = 0, 0
+
+    def resize(self, data):
+        """ 按max_pixels等比例缩小，返回(图片字节, mime)；图片不需要缩小时返回None """
+        from PIL import Image
+        with Image.open(io.BytesIO(data)) as image:
+            width, height = image.size
+            if width * height <= self.max_pixels:
+                return None
+            scale = (self.max_pixels / (width * height)) ** 0.5
+            image = image.convert("RGB").resize((max(1, int(width * scale)), max(1, int(height * scale))), Image.BICUBIC)
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG", quality=95)
+        return buffer.getvalue(), "image/jpeg"
+
+    def encode(self, path, data):
+        mime = mimetypes.guess_type(path)[0] or "image/jpeg"
+        if self.max_pixels is not None:
+            resized = self.resize(data)
+            if resized is not None:
+                data, mime = resized
+        return f"data:{mime};base64," + base64.b64encode(data).decode("ascii")
+
+    def url(self, path):
+        """ 图片的data URL；内容hash与回复缓存共用cache.file_hash，同一文件只计算一次 """
+        digest = known_hash(path)
+        with self.lock:
+            if digest in self.entries:
+                self.entries.move_to_end(digest)
+                self.hits += 1
+                return self.entries[digest]
+
+        with open(path, "rb") as f:
+            data = f.read()
+        if digest is None:
+            digest = file_hash(path, data)
+            with self.lock:
+                if digest in self.entries:  # 内容相同的另一个文件已经编码过
+                    self.entries.move_to_end(digest)
+                    self.hits += 1
+                    return self.entries[digest]
+        url = self.encode(path, data)
+
+        with self.lock:
+            self.misses += 1
+            if digest not in self.entries:
+                self.entries[digest] = url
+                self.total_bytes += len(url)
+                while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+                    _, old = self.entries.popitem(last=False)
+                    self.total_bytes -= len(old)
+        return url
+
+    def preload(self, paths, workers=16):
+        """ 用线程池提前读取并编码一批图片（缓存容量之内） """
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for _ in pool.map(self.url, paths):
+                pass
+
+
+def image_url(image_path, images=None):
+    """ 传入ImageCache时发送data URL，否则沿用file://路径，由服务端读取图片 """
+    if images is None:
+        return "file://" + image_path
+    return images.url(image_path)
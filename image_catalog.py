@@ -0,0 +1,134 @@
+import os
+import io
+import sys
+import hashlib
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from vg_annotations import image_id
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".gif", ".webp")
+
+
+def describe(path):
+    """ 读取一次图片，返回(内容hash, 宽, 高)；没有安装Pillow或无法解析时宽高为None """
+    with open(path, "rb") as f:
+        data = f.read()
+    width, height = None, None
+    try:
+        from PIL import Image
+        with Image.open(io.BytesIO(data)) as image:
+            width, height = image.size
+    except Exception:
+        pass
+    return hashlib.sha256(data).hexdigest(), width, height
+
+
+class ImageCatalog:
+    """
+    图片目录的持久索引（SQLite），每张图片一行：路径、VG图片id、文件大小、宽高、内容hash、VG划分(VG_100K / VG_100K_2)
+    - update(image_dir)：扫描目录比较每个文件的(大小, 修改时间)，只为新增或变化的文件计算hash和宽高，删除已不存在的文件
+      (原地覆盖图片不改变目录的修改时间，因此每次都比较文件本身)
+    - images(image_dir)：按VG图片id排序，与文件系统的返回顺序无关，切片在不同机器上可复现
+    """
+    def __init__(self, path="./dataset/image_catalog.sqlite"):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS images "
+                          "(path TEXT PRIMARY KEY, image_dir TEXT, name TEXT, image_id INTEGER, size INTEGER, "
+                          "mtime_ns INTEGER, width INTEGER, height INTEGER, sha256 TEXT, split TEXT)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS images_order ON images(image_dir, image_id, name)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS dirs (image_dir TEXT PRIMARY KEY, mtime_ns INTEGER)")  # 已建立索引的目录
+
+    @staticmethod
+    def normalize(image_dir):
+        return os.path.abspath(image_dir)
+
+    def indexed(self, image_dir):
+        with self.lock:
+            return self.conn.execute("SELECT mtime_ns FROM dirs WHERE image_dir=?",
+                                     (self.normalize(image_dir),)).fetchone() is not None
+
+    def update(self, image_dir, force=False, workers=16):
+        """ 增量更新一个图片目录，返回(新增或修改的数量, 删除的数量)；force=True时重新计算所有文件 """
+        image_dir = self.normalize(image_dir)
+        dir_mtime = os.stat(image_dir).st_mtime_ns
+        with self.lock:
+            known = {name: (size, mtime) for name, size, mtime in
+                     self.conn.execute("SELECT name, size, mtime_ns FROM images WHERE image_dir=?", (image_dir,))}
+        files = {}
+        with os.scandir(image_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                    stat = entry.stat()
+                    files[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        changed = [name for name, meta in files.items() if force or known.get(name) != meta]
+        removed = [name for name in known if name not in files]
+
+        split = os.path.basename(image_dir)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            described = pool.map(describe, [os.path.join(image_dir, name) for name in changed])
+            rows = [(os.path.join(image_dir, name), image_dir, name, image_id(name), *files[name], width, height, sha256, split)
+                    for name, (sha256, width, height) in zip(changed, described)]
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.conn.executemany("DELETE FROM images WHERE path=?", [(os.path.join(image_dir, name),) for name in removed])
+            self.conn.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?)", (image_dir, dir_mtime))
+        return len(changed), len(removed)
+
+    def images(self, image_dir):
+        """ 目录中的图片文件名，按VG图片id排序，非VG命名的图片按文件名排在最后 """
+        with self.lock:
+            rows = self.conn.execute("SELECT name FROM images WHERE image_dir=? ORDER BY image_id IS NULL, image_id, name",
+                                     (self.normalize(image_dir),)).fetchall()
+        return [name for name, in rows]
+
+    def get(self, image_path):
+        """ 一张图片的记录(dict)，不在索引中时返回None """
+        with self.lock:
+            cursor = self.conn.execute("SELECT * FROM images WHERE path=?", (os.path.abspath(image_path),))
+            row = cursor.fetchone()
+            return dict(zip([c[0] for c in cursor.description], row)) if row else None
+
+    def missing(self, image_paths):
+        """
+        image_paths中不存在的图片，保持原顺序
+        已建立索引的目录先增量更新再查索引；没有索引的目录逐个检查文件
+        """
+        image_paths = list(image_paths)
+        by_dir = {}
+        for image_path in image_paths:
+            by_dir.setdefault(os.path.dirname(os.path.abspath(image_path)), set()).add(image_path)
+        absent = set()
+        for image_dir, paths in by_dir.items():
+            if not os.path.isdir(image_dir):
+                absent |= paths
+            elif self.indexed(image_dir):
+                self.update(image_dir)
+                names = set(self.images(image_dir))
+                absent |= {p for p in paths if os.path.basename(p) not in names}
+            else:
+                absent |= {p for p in paths if not os.path.exists(p)}
+        return [p for p in image_paths if p in absent]
+
+    def close(self):
+        self.conn.close()
+
+
+def list_images(image_dir, path="./dataset/image_catalog.sqlite"):
+    """ 替代os.listdir(image_dir)：增量更新索引后按VG图片id的固定顺序返回文件名 """
+    catalog = ImageCatalog(path)
+    catalog.update(image_dir)
+    images = catalog.images(image_dir)
+    catalog.close()
+    return images
+
+
+if __name__=="__main__":
+    # python image_catalog.py /path/to/VG_100K /path/to/VG_100K_2 ...
+    catalog = ImageCatalog()
+    for image_dir in sys.argv[1:]:
+        changed, removed = catalog.update(image_dir)
+        print(f"{image_dir}: {len(catalog.images(image_dir))} images, {changed} updated, {removed} removed")
@@ -0,0 +1,133 @@
+import json
+import os
+import time
+
+
+class Journal:
+    """
+    追加写入的JSONL结果文件，用于生成、测试和评测的断点恢复
+    每行的key由key_fn(row)给出，例如(image, type, label, stage)，恢复时按key跳过已完成的数据
+    - 批量fsync：每flush_every条或每flush_interval秒落盘一次
+    - 损坏恢复：打开时截掉末尾写了一半的行
+    - 索引文件<path>.idx：每行为[该行结束时的文件偏移, key]，恢复时只需读取索引并扫描其后新增的部分
+    """
+    def __init__(self, path, key_fn, flush_every=64, flush_interval=5.0):
+        self.path = path
+        self.index_path = path + ".idx"
+        self.key_fn = key_fn
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.keys = set()
+        self.pending = 0
+        self.last_flush = time.time()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.recover()
+        self.file = open(self.path, "ab")
+        self.index = open(self.index_path, "ab")
+
+    @staticmethod
+    def as_key(key):
+        return tuple(key) if isinstance(key, list) else key
+
+    def load_index(self):
+        """ 读取索引，返回索引覆盖到的文件偏移；索引与结果文件不一致时返回0并重建 """
+        offset = 0
+        if not os.path.exists(self.index_path):
+            return 0
+        valid = 0  # 最后一条完整索引行结束处的位置
+        with open(self.index_path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # 索引末尾写了一半的行
+                try:
+                    end, key = json.loads(line)
+                except ValueError:
+                    break
+                self.keys.add(self.as_key(key))
+                offset = end
+                valid += len(line)
+        if valid < os.path.getsize(self.index_path):
+            # 截掉损坏的部分，否则新的索引行会接在半行之后，之后每次打开都要从这里重新扫描
+            with open(self.index_path, "r+b") as f:
+                f.truncate(valid)
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if offset > size or not self.ends_with_newline(offset):
+            self.keys.clear()
+            return 0
+        return offset
+
+    def ends_with_newline(self, offset):
+        if offset == 0:
+            return True
+        with open(self.path, "rb") as f:
+            f.seek(offset - 1)
+            return f.read(1) == b"\n"
+
+    def recover(self):
+        offset = self.load_index()
+        if offset == 0 and os.path.exists(self.index_path):
+            os.remove(self.index_path)  # 重建索引
+        if not os.path.exists(self.path):
+            return
+        entries = []
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # 末尾写了一半的行
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    print(f"skip broken line at offset {offset} in {self.path}")
+                    offset += len(line)
+                    continue
+                offset += len(line)
+                key = self.as_key(self.key_fn(row))
+                self.keys.add(key)
+                entries.append([offset, key])
+        if offset < os.path.getsize(self.path):
+            print(f"truncate torn write at offset {offset} in {self.path}")
+            with open(self.path, "r+b") as f:
+                f.truncate(offset)
+        if entries:
+            with open(self.index_path, "ab") as f:
+                f.write(b"".join(self.dumps(e) for e in entries))
+
+    @staticmethod
+    def dumps(obj):
+        return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+    def __contains__(self, key):
+        return self.as_key(key) in self.keys
+
+    def __len__(self):
+        return len(self.keys)
+
+    def append(self, row):
+        key = self.as_key(self.key_fn(row))
+        self.file.write(self.dumps(row))
+        self.keys.add(key)
+        self.index.write(self.dumps([self.file.tell(), key]))
+        self.pending += 1
+        if self.pending >= self.flush_every or time.time() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """ 先落盘结果文件再落盘索引，保证索引不会指向未写入的数据 """
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.index.flush()
+        os.fsync(self.index.fileno())
+        self.pending = 0
+        self.last_flush = time.time()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
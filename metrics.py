@@ -0,0 +1,216 @@
+import os
+import json
+import time
+import atexit
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# 每次模型请求的标签，通过contextvars在异步任务之间传递
+TAGS = ("script", "stage", "q_type", "endpoint")
+_tags = contextvars.ContextVar("metric_tags", default={})
+
+# 延迟直方图的分桶(秒)
+BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, float("inf"))
+
+
+def set_tags(**tags):
+    """ 设置当前上下文的标签（例如脚本入口处设置script），之后创建的异步任务都会继承 """
+    _tags.set({**_tags.get(), **tags})
+
+@contextmanager
+def tagged(**tags):
+    """ 在with块内追加标签，例如 with tagged(stage="judge", q_type=...) """
+    token = _tags.set({**_tags.get(), **tags})
+    try:
+        yield
+    finally:
+        _tags.reset(token)
+
+
+class Series:
+    def __init__(self):
+        self.calls = 0
+        self.errors = {}          # 错误类型 -> 次数
+        self.retries = 0
+        self.latency_sum = 0.0
+        self.buckets = [0] * len(BUCKETS)
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+
+class Metrics:
+    """
+    模型请求的指标：每次调用的延迟、prompt/completion token数、重试和错误，按TAGS中的标签聚合
+    - prometheus(): Prometheus文本格式，serve(port)在后台线程提供 /metrics
+    - snapshot(): JSON快照，dump_every(path, interval)定期写入文件
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.series = {}
+        self.start_time = time.time()
+
+    def get(self, tags):
+        key = tuple(str(tags.get(name, "")) for name in TAGS)
+        if key not in self.series:
+            self.series[key] = Series()
+        return self.series[key]
+
+    def observe(self, latency, usage=None, error=None, **tags):
+        """ 记录一次请求，usage为completion.usage，error为失败时的错误类型名 """
+        tags = {**_tags.get(), **tags}
+        with self.lock:
+            series = self.get(tags)
+            if error is not None:
+                series.errors[error] = series.errors.get(error, 0) + 1
+                return
+            series.calls += 1
+            series.latency_sum += latency
+            for i, bound in enumerate(BUCKETS):
+                if latency <= bound:
+                    series.buckets[i] += 1
+                    break
+            if usage is not None:
+                series.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+                series.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+
+    def retry(self, **tags):
+        tags = {**_tags.get(), **tags}
+        with self.lock:
+            self.get(tags).retries += 1
+
+    def snapshot(self):
+        with self.lock:
+            rows = []
+            for key, s in self.series.items():
+                rows.append({
+                    **dict(zip(TAGS, key)),
+                    "calls": s.calls,
+                    "errors": dict(s.errors),
+                    "retries": s.retries,
+                    "latency_mean": s.latency_sum / s.calls if s.calls else 0,
+                    "latency_p50": self.quantile(s.buckets, 0.5),
+                    "latency_p99": self.quantile(s.buckets, 0.99),
+                    "prompt_tokens": s.prompt_tokens,
+                    "completion_tokens": s.completion_tokens,
+                })
+        return {"time": time.time(), "uptime": time.time() - self.start_time, "series": rows}
+
+    @staticmethod
+    def quantile(buckets, q):
+        """ 由直方图估计分位数，在所在分桶内线性插值 """
+        total = sum(buckets)
+        if total == 0:
+            return 0
+        count, lower = 0, 0.0
+        for bound, n in zip(BUCKETS, buckets):
+            if n > 0 and count + n >= total * q:
+                if bound == float("inf"):
+                    return lower
+                return lower + (bound - lower) * (total * q - count) / n
+            count += n
+            lower = bound
+        return lower
+
+    def prometheus(self):
+        def labels(key, **extra):
+            pairs = [f'{name}="{value}"' for name, value in zip(TAGS, key)] + [f'{k}="{v}"' for k, v in extra.items()]
+            return "{" + ",".join(pairs) + "}"
+
+        lines = ["# TYPE model_request_seconds histogram"]
+        with self.lock:
+            series = list(self.series.items())
+            for key, s in series:
+                count = 0
+                for bound, n in zip(BUCKETS, s.buckets):
+                    count += n
+                    le = "+Inf" if bound == float("inf") else bound
+                    lines.append(f"model_request_seconds_bucket{labels(key, le=le)} {count}")
+                lines.append(f"model_request_seconds_sum{labels(key)} {s.latency_sum}")
+                lines.append(f"model_request_seconds_count{labels(key)} {s.calls}")
+            lines.append("# TYPE model_tokens_total counter")
+            for key, s in series:
+                lines.append(f"model_tokens_total{labels(key, kind='prompt')} {s.prompt_tokens}")
+                lines.append(f"model_tokens_total{labels(key, kind='completion')} {s.completion_tokens}")
+            lines.append("# TYPE model_retries_total counter")
+            for key, s in series:
+                lines.append(f"model_retries_total{labels(key)} {s.retries}")
+            lines.append("# TYPE model_errors_total counter")
+            for key, s in series:
+                for error, n in s.errors.items():
+                    lines.append(f"model_errors_total{labels(key, error=error)} {n}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=9100):
+        """ 在后台线程提供Prometheus抓取接口 http://<host>:port/metrics """
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def dump(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, path)
+
+    def dump_every(self, path, interval=60):
+        """ 每interval秒写一次JSON快照，进程退出时再写一次 """
+        def loop():
+            while True:
+                time.sleep(interval)
+                self.dump(path)
+        threading.Thread(target=loop, daemon=True).start()
+        atexit.register(self.dump, path)
+
+    def format_summary(self):
+        """ 按(stage, endpoint)汇总的表格，用于估算每条数据的耗时和token成本 """
+        totals = {}
+        for row in self.snapshot()["series"]:
+            t = totals.setdefault((row["stage"], row["endpoint"]), [0, 0.0, 0, 0, 0, 0])
+            t[0] += row["calls"]
+            t[1] += row["latency_mean"] * row["calls"]
+            t[2] += row["prompt_tokens"]
+            t[3] += row["completion_tokens"]
+            t[4] += row["retries"]
+            t[5] += sum(row["errors"].values())
+        lines = ["stage        calls  latency(s)  prompt_tok  compl_tok  retries  errors  endpoint"]
+        for (stage, endpoint), (calls, latency, prompt, completion, retries, errors) in sorted(totals.items()):
+            lines.append(f"{stage or '-':<12} {calls:>5} {latency / calls if calls else 0:>11.2f} "
+                         f"{prompt / calls if calls else 0:>11.0f} {completion / calls if calls else 0:>10.0f} "
+                         f"{retries:>8} {errors:>7}  {endpoint}")
+        return "\n".join(lines)
+
+
+metrics = Metrics()
+_started = False
+
+
+def start_metrics(script):
+    """
+    脚本入口调用：设置script标签
+    环境变量METRICS_PORT设置时提供Prometheus接口，METRICS_FILE设置时定期写入JSON快照
+    """
+    set_tags(script=script)
+    global _started
+    if _started:
+        return
+    _started = True
+    if os.environ.get("METRICS_PORT"):
+        metrics.serve(int(os.environ["METRICS_PORT"]))
+    if os.environ.get("METRICS_FILE"):
+        metrics.dump_every(os.environ["METRICS_FILE"], int(os.environ.get("METRICS_INTERVAL", 60)))
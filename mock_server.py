@@ -0,0 +1,286 @@
+"""
+本地的OpenAI兼容模拟服务，用于在没有GPU的机器上测量生成/测试/评测流程的吞吐
+python mock_server.py --port 7777,8888,7001 --latency 0.3 --token-rate 60 --error-rate 0.01
+录制真实流量: python mock_server.py --port 7777 --upstream http://gpu:7777 --record traffic.jsonl
+回放: python mock_server.py --port 7777 --replay traffic.jsonl
+"""
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# 按prompt开头识别流水线步骤，返回固定的回答
+STAGE_MARKERS = [
+    ("judge-eval", "You are a strict evaluation judge"),
+    ("judge", "You are an image understanding model"),
+    ("caption", "You are an image captioning model"),
+    ("question", "You are a question generation model"),
+    ("answer", "You are a reasoning model"),
+]
+
+CANNED_ANSWERS = {
+    "judge": ["man is sad", "red car", "two dogs", "cup on the table", "No"],
+    "caption": ["A man sits alone on a bench and looks sad.", "A red car is parked next to a tree."],
+    "question": ["Why is the happy man sitting on the bench?", "What is the blue car next to?"],
+    "answer": ["<think>\nThe image shows a sad man, not a happy one.\n</think>\n\n<answer>\nThe premise is wrong: the man looks sad.\n</answer>"],
+    "judge-eval": ["True", "False"],
+    "test": ["The premise of the question is incorrect, the man in the image looks sad.", "He is waiting for a bus."],
+}
+
+
+def detect_stage(text):
+    text = text.lstrip()
+    for stage, marker in STAGE_MARKERS:
+        if text.startswith(marker):
+            return stage
+    return "test"
+
+
+def message_text(messages):
+    """ 取出消息中的文本部分，图片(data URL)不计入 """
+    parts = []
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            parts.append(content)
+        else:
+            parts += [c.get("text", "") for c in content or [] if c.get("type") == "text"]
+    return "\n".join(parts)
+
+
+def count_tokens(text):
+    # 近似：英文平均每个单词1.3个token
+    return max(1, int(len(text.split()) * 1.3))
+
+
+def request_key(path, body):
+    return hashlib.sha256(json.dumps([path, body], sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class MockModel:
+    """
+    模拟的推理服务
+    - 延迟 = 首token延迟(对数正态，中位数latency，离散程度jitter) + 输出token数 / token_rate
+    - 在途请求超过capacity时延迟按比例增加，模拟连续批处理饱和
+    - error_rate的请求返回429或500
+    - replay中有录制的回复时直接使用录制的回复
+    """
+    def __init__(self, models=("mock",), latency=0.2, jitter=0.3, token_rate=50.0, capacity=64,
+                 error_rate=0.0, answers=None, replay=None, upstream=None, record=None, seed=0):
+        self.models = list(models)
+        self.latency = latency
+        self.jitter = jitter
+        self.token_rate = token_rate
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.answers = {**CANNED_ANSWERS, **(answers or {})}
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.inflight = 0
+        self.upstream = upstream.rstrip("/") if upstream else None
+        self.record_file = open(record, "a") if record else None
+        self.recorded = {}
+        if replay:
+            with open(replay, "r") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    self.recorded.setdefault(entry["key"], []).append(entry)
+
+    def delay(self, completion_tokens):
+        with self.lock:
+            ttft = self.latency * self.random.lognormvariate(0, self.jitter)
+            load = max(1.0, self.inflight / self.capacity)
+        return (ttft + completion_tokens / self.token_rate) * load
+
+    def answer(self, stage, body):
+        schema = (body.get("response_format") or {}).get("json_schema", {}).get("schema")
+        if schema is not None and schema.get("type") == "array":
+            k = schema["minItems"]  # 打包评测的结构化输出
+            with self.lock:
+                return json.dumps([self.random.random() < 0.5 for _ in range(k)])
+        if schema is not None and schema.get("type") == "object":
+            with self.lock:  # 多类型judge，每个类型一个premise
+                return json.dumps({key: self.random.choice(self.answers[stage]) for key in schema["properties"]})
+        with self.lock:
+            return self.random.choice(self.answers[stage])
+
+    def error(self):
+        with self.lock:
+            if self.random.random() >= self.error_rate:
+                return None
+            return self.random.choice([429, 500])
+
+    def forward(self, path, body):
+        """ 转发到真实服务并录制 """
+        request = urllib.request.Request(self.upstream + path, data=json.dumps(body).encode("utf-8"),
+                                         headers={"Content-Type": "application/json", "Authorization": "Bearer 00000000"})
+        start = time.perf_counter()
+        with urllib.request.urlopen(request, timeout=600) as response:
+            result = json.loads(response.read())
+        entry = {"key": request_key(path, body), "path": path, "latency": time.perf_counter() - start, "response": result}
+        with self.lock:
+            self.record_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self.record_file.flush()
+        return result
+
+    def replayed(self, path, body):
+        entries = self.recorded.get(request_key(path, body))
+        if not entries:
+            return None
+        with self.lock:
+            entry = entries[0]
+            entries.append(entries.pop(0))  # 同一个请求录制了多次时轮流返回
+        return entry
+
+    def chat(self, body):
+        text = message_text(body.get("messages", []))
+        stage = detect_stage(text)
+        n = body.get("n") or 1
+        contents = [self.answer(stage, body) for _ in range(n)]
+        completion_tokens = sum(count_tokens(c) for c in contents)
+        time.sleep(self.delay(completion_tokens / n))
+        return {
+            "id": "chatcmpl-mock", "object": "chat.completion", "created": int(time.time()), "model": body.get("model"),
+            "choices": [{"index": i, "message": {"role": "assistant", "content": c}, "finish_reason": "stop"}
+                        for i, c in enumerate(contents)],
+            "usage": {"prompt_tokens": count_tokens(text), "completion_tokens": completion_tokens,
+                      "total_tokens": count_tokens(text) + completion_tokens},
+        }
+
+    def completions(self, body):
+        """ 多prompt completions接口，prompt为token id列表的列表 """
+        prompts = body["prompt"] if isinstance(body["prompt"], list) else [body["prompt"]]
+        n = body.get("n") or 1
+        choices = []
+        for i in range(len(prompts) * n):
+            with self.lock:
+                text = self.random.choice(self.answers["question"])
+            choices.append({"index": i, "text": text, "finish_reason": "stop"})
+        prompt_tokens = sum(len(p) if isinstance(p, list) else count_tokens(p) for p in prompts)
+        completion_tokens = sum(count_tokens(c["text"]) for c in choices)
+        time.sleep(self.delay(completion_tokens / len(choices)))
+        return {
+            "id": "cmpl-mock", "object": "text_completion", "created": int(time.time()), "model": body.get("model"),
+            "choices": choices,
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+    def tokenize(self, body):
+        text = message_text(body.get("messages", [])) if "messages" in body else body.get("prompt", "")
+        tokens = list(range(count_tokens(text)))
+        return {"tokens": tokens, "count": len(tokens), "max_model_len": 32768}
+
+    def handle(self, path, body):
+        """ 返回(状态码, 回复) """
+        if self.upstream:
+            try:
+                return 200, self.forward(path, body)
+            except urllib.error.HTTPError as e:
+                return e.code, json.loads(e.read() or b"{}")
+        entry = self.replayed(path, body)
+        if entry is not None:
+            time.sleep(entry["latency"])
+            return 200, entry["response"]
+        code = self.error()
+        if code is not None:
+            time.sleep(self.delay(0))
+            return code, {"error": {"message": "mock error", "type": "mock", "code": code}}
+        if path.endswith("/chat/completions"):
+            return 200, self.chat(body)
+        if path.endswith("/completions"):
+            return 200, self.completions(body)
+        if path.endswith("/tokenize"):
+            return 200, self.tokenize(body)
+        return 404, {"error": {"message": f"unknown path {path}"}}
+
+
+def make_handler(model):
+    class Handler(BaseHTTPRequestHandler):
+        def send(self, code, obj):
+            body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/models"):
+                self.send(200, {"object": "list", "data": [{"id": m, "object": "model"} for m in model.models]})
+            else:
+                self.send(200, {"status": "ok"})  # /health
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            with model.lock:
+                model.inflight += 1
+            try:
+                code, result = model.handle(self.path, body)
+            finally:
+                with model.lock:
+                    model.inflight -= 1
+            self.send(code, result)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(model, ports, host="0.0.0.0"):
+    """ 在多个端口上提供同一个模拟模型，每个端口一个线程 """
+    servers = []
+    for port in ports:
+        server = ThreadingHTTPServer((host, port), make_handler(model))
+        server.request_queue_size = 1024
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    return servers
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="OpenAI-compatible mock server")
+    parser.add_argument("--port", default="7777", help="逗号分隔的端口列表")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--models", default="mock", help="/v1/models返回的模型名，逗号分隔")
+    parser.add_argument("--latency", type=float, default=0.2, help="首token延迟的中位数(秒)")
+    parser.add_argument("--jitter", type=float, default=0.3, help="首token延迟对数正态分布的sigma")
+    parser.add_argument("--token-rate", type=float, default=50.0, help="每秒输出的token数")
+    parser.add_argument("--capacity", type=int, default=64, help="超过该在途请求数后延迟线性增加")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--answers", help="JSON文件，{步骤: [回答, ...]}，覆盖默认回答")
+    parser.add_argument("--upstream", help="录制模式：转发到的真实服务地址")
+    parser.add_argument("--record", help="录制模式：录制文件")
+    parser.add_argument("--replay", help="回放模式：录制文件")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    if bool(args.upstream) != bool(args.record):
+        parser.error("--upstream and --record must be given together")
+
+    answers = None
+    if args.answers:
+        with open(args.answers, "r") as f:
+            answers = json.load(f)
+    model = MockModel(models=args.models.split(","), latency=args.latency, jitter=args.jitter,
+                      token_rate=args.token_rate, capacity=args.capacity, error_rate=args.error_rate,
+                      answers=answers, replay=args.replay, upstream=args.upstream, record=args.record, seed=args.seed)
+    ports = [int(p) for p in args.port.split(",")]
+    serve(model, ports, args.host)
+    print(f"mock server listening on {ports}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__=="__main__":
+    main(sys.argv[1:])
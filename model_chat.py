@@ -1,53 +1,551 @@
 import json
-from openai import OpenAI
-import requests
-from tqdm import tqdm
+import time
+import random
+import asyncio
+import threading
+from types import SimpleNamespace
+from collections import deque
 import os
+from image_cache import image_url
+from metrics import metrics
 
-MLLM_client = OpenAI(
-                    base_url="http://localhost:7777/v1",
-                    api_key="00000000",
-                )
+# openai/httpx/requests 只在真正发请求时才导入，只算指标的脚本(evaluate.py)不需要安装它们
+
+def replica_errors():
+    """ 副本故障类错误：连接失败、超时、5xx，出现时将副本移出轮转 """
+    import openai
+    return (openai.APIConnectionError, openai.APITimeoutError, openai.InternalServerError)
+
+def retry_errors():
+    """ 可以重试的错误：副本故障以及429限流 """
+    import openai
+    return replica_errors() + (openai.RateLimitError,)
+
+
+class LazyClient:
+    """ 第一次访问属性时才创建真正的client，导入model_chat时不会加载openai """
+    def __init__(self, factory):
+        self.factory = factory
+        self.client = None
+        self.lock = threading.Lock()
+
+    def resolve(self):
+        if self.client is None:
+            with self.lock:
+                if self.client is None:
+                    self.client = self.factory()
+        return self.client
+
+    def __getattr__(self, name):
+        return getattr(self.resolve(), name)
+
+def resolve(client):
+    return client.resolve() if isinstance(client, LazyClient) else client
+
+
+class Endpoint:
+    def __init__(self, base_url, api_key):
+        self.base_url = base_url.rstrip("/")
+        from openai import OpenAI
+        self.client = OpenAI(base_url=self.base_url, api_key=api_key, max_retries=0)  # 失败后由Router换副本重试
+        self.outstanding = 0  # 在途请求数
+        self.healthy = True
+
+
+class Router:
+    """
+    同一模型多个vLLM副本的客户端路由
+    按最少在途请求数分发请求；后台定期检查/v1/models，故障副本移出轮转，恢复后重新加入
+    与OpenAI client接口兼容，可以直接传给MLLM/LLM
+    """
+    def __init__(self, base_urls, api_key="00000000", check_interval=10):
+        self.endpoints = [Endpoint(url, api_key) for url in base_urls]
+        self.api_key = api_key
+        self.name = ",".join(e.base_url for e in self.endpoints)
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self.checker = None
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=lambda **kw: self.request("chat", **kw)))
+        self.completions = SimpleNamespace(create=lambda **kw: self.request("completions", **kw))
+        self.aclient = SimpleNamespace(
+                chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **kw: self.arequest("chat", **kw))),
+                completions=SimpleNamespace(create=lambda **kw: self.arequest("completions", **kw)),
+            )
+
+    @property
+    def base_url(self):
+        """ 当前负载最低的健康副本地址 """
+        with self.lock:
+            return self.pick().base_url
+
+    def pick(self, exclude=()):
+        candidates = [e for e in self.endpoints if e.healthy and e not in exclude]
+        if not candidates:  # 全部不健康时仍然尝试，避免请求全部卡住
+            candidates = [e for e in self.endpoints if e not in exclude] or self.endpoints
+        return min(candidates, key=lambda e: e.outstanding)
+
+    def acquire(self, exclude=()):
+        self.start_health_check()
+        with self.lock:
+            endpoint = self.pick(exclude)
+            endpoint.outstanding += 1
+        return endpoint
+
+    def release(self, endpoint, failed=False):
+        with self.lock:
+            endpoint.outstanding -= 1
+            if failed:
+                endpoint.healthy = False
+                print(f"endpoint {endpoint.base_url} failed, removed from rotation")
 
-LLM_client = OpenAI(
-                    base_url="http://localhost:8888/v1",
-                    api_key="00000000",
+    def request(self, kind, **kwargs):
+        tried = []
+        while True:
+            endpoint = self.acquire(exclude=tried)
+            client = endpoint.client.chat if kind == "chat" else endpoint.client
+            failed = False
+            try:
+                return client.completions.create(**kwargs)
+            except replica_errors():
+                failed = True  # 只有副本故障才移出轮转，429/400/取消等不影响副本状态
+                tried.append(endpoint)
+                if len(tried) >= len(self.endpoints):
+                    raise
+            finally:
+                self.release(endpoint, failed=failed)
+
+    async def arequest(self, kind, **kwargs):
+        tried = []
+        while True:
+            endpoint = self.acquire(exclude=tried)
+            aclient = get_async_client(endpoint.client)
+            client = aclient.chat if kind == "chat" else aclient
+            failed = False
+            try:
+                return await client.completions.create(**kwargs)
+            except replica_errors():
+                failed = True  # 只有副本故障才移出轮转，429/400/取消等不影响副本状态
+                tried.append(endpoint)
+                if len(tried) >= len(self.endpoints):
+                    raise
+            finally:
+                self.release(endpoint, failed=failed)
+
+    def check(self, endpoint):
+        import requests
+        try:
+            response = requests.get(url=f"{endpoint.base_url}/models",
+                                    headers={"Authorization": f"Bearer {self.api_key}"}, timeout=5)
+            return response.status_code == 200
+        except requests.RequestException:
+            return False
+
+    def health_check_loop(self):
+        while True:
+            for endpoint in self.endpoints:
+                healthy = self.check(endpoint)
+                if healthy and not endpoint.healthy:
+                    print(f"endpoint {endpoint.base_url} recovered, back in rotation")
+                endpoint.healthy = healthy
+            time.sleep(self.check_interval)
+
+    def start_health_check(self):
+        if self.checker is None:
+            with self.lock:
+                if self.checker is None:
+                    self.checker = threading.Thread(target=self.health_check_loop, daemon=True)
+                    self.checker.start()
+
+
+def make_client(base_urls, api_key="00000000"):
+    """ base_urls 为逗号分隔的地址列表，只有一个地址时返回普通OpenAI client，多个时返回Router """
+    from openai import OpenAI
+    urls = [url.strip() for url in base_urls.split(",") if url.strip()]
+    if len(urls) == 1:
+        return OpenAI(base_url=urls[0], api_key=api_key)
+    return Router(urls, api_key=api_key)
+
+def client_name(client):
+    """ 用于区分端点的名字，Router为所有副本地址 """
+    client = resolve(client)
+    return client.name if isinstance(client, Router) else str(client.base_url).rstrip("/")
+
+
+# 通过环境变量 MLLM_ENDPOINTS / LLM_ENDPOINTS 指定多个副本，例如
+# MLLM_ENDPOINTS=http://localhost:7777/v1,http://gpu2:7777/v1
+MLLM_client = LazyClient(lambda: make_client(os.environ.get("MLLM_ENDPOINTS", "http://localhost:7777/v1")))
+
+LLM_client = LazyClient(lambda: make_client(os.environ.get("LLM_ENDPOINTS", "http://localhost:8888/v1")))
+
+# 异步请求共用的keep-alive连接池，每个事件循环一个
+_http_pools = {}
+_async_clients = {}
+
+def get_http_pool(max_connections=512):
+    loop = asyncio.get_running_loop()
+    pool = _http_pools.get(loop)
+    if pool is None:
+        import httpx
+        _http_pools.clear()  # 旧事件循环上的连接池已不可用
+        _async_clients.clear()
+        pool = httpx.AsyncClient(
+                    limits=httpx.Limits(max_connections=max_connections,
+                                        max_keepalive_connections=max_connections,
+                                        keepalive_expiry=60),
+                    timeout=httpx.Timeout(600, connect=10),
                 )
+        _http_pools[loop] = pool
+    return pool
+
+def get_async_client(client):
+    """ 根据同步client得到同一base_url的异步client，所有异步client共用一个连接池 """
+    client = resolve(client)
+    if isinstance(client, Router):
+        return client.aclient
+    pool = get_http_pool()
+    base_url = str(client.base_url)
+    if base_url not in _async_clients:
+        from openai import AsyncOpenAI
+        # SDK内部不重试：429/5xx/超时要立即反馈给AdaptiveLimiter，重试统一由with_retry负责
+        _async_clients[base_url] = AsyncOpenAI(base_url=base_url, api_key=client.api_key,
+                                                  max_retries=0, http_client=pool)
+    return _async_clients[base_url]
+
+class AdaptiveLimiter:
+    """
+    端点的自适应并发上限(AIMD + 延迟梯度)，每收集max(window, limit)个请求(约一个往返)调整一次
+    - 窗口p50不超过基线(历史最小p50)的tolerance倍，说明服务端还没有排队，上限增加sqrt(limit)
+    - 窗口p95超过基线的spike倍，或出现429/超时/5xx/连接错误时，上限乘以backoff
+    - 降低上限之前发出的请求不再计入统计，避免一次过载被重复惩罚
+    - 基线只取最近horizon秒内的窗口，请求的输出长度整体变化(例如从judge切换到caption)后能重新校准
+    """
+    def __init__(self, initial=16, min_limit=1, max_limit=256, window=16,
+                 tolerance=1.5, spike=3.0, backoff=0.7, horizon=60):
+        self.limit = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.window = window
+        self.tolerance = tolerance
+        self.spike = spike
+        self.backoff = backoff
+        self.horizon = horizon
+        self.history = deque()  # (时间, 窗口p50)
+        self.baseline = None
+        self.samples = []
+        self.generation = 0  # 每次降低上限加1
+        self.inflight = 0
+        self.loop = None
+        self.condition = None
+
+    def fix(self, limit):
+        """ 关闭自适应，固定为limit """
+        self.limit = self.min_limit = self.max_limit = limit
+
+    def bind(self):
+        # asyncio.Condition属于创建它的事件循环，换了事件循环(例如多次asyncio.run)时重新创建，已学到的上限保留
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self.loop = loop
+            self.condition = asyncio.Condition()
+            self.inflight = 0
+
+    async def run(self, request):
+        """ request为返回协程的函数，在上限允许时执行并记录延迟 """
+        self.bind()
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.inflight < self.limit)
+            self.inflight += 1
+        generation = self.generation
+        start = time.perf_counter()
+        try:
+            result = await request()
+        except retry_errors():
+            if generation == self.generation:
+                self.decrease()
+            raise
+        else:
+            if generation == self.generation:
+                self.record(time.perf_counter() - start)
+            return result
+        finally:
+            async with self.condition:
+                self.inflight -= 1
+                self.condition.notify_all()
+
+    def record(self, latency):
+        self.samples.append(latency)
+        if len(self.samples) < max(self.window, self.limit):
+            return
+        samples = sorted(self.samples)
+        self.samples = []
+        p50 = samples[len(samples) // 2]
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        now = time.time()
+        self.history.append((now, p50))
+        while self.history[0][0] < now - self.horizon:
+            self.history.popleft()
+        self.baseline = min(p for _, p in self.history)
+        if p95 > self.baseline * self.spike:
+            self.decrease()
+        elif p50 <= self.baseline * self.tolerance:
+            self.limit = min(self.max_limit, self.limit + max(1, int(self.limit ** 0.5)))
+
+    def decrease(self):
+        self.limit = max(self.min_limit, int(self.limit * self.backoff))
+        self.samples = []
+        self.generation += 1
+
+_limiters = {}
+
+def endpoint_limiter(client):
+    """ 每个端点(Router为一组副本)一个AdaptiveLimiter，同一端点上的所有MLLM/LLM请求共用 """
+    name = client_name(client)
+    if name not in _limiters:
+        _limiters[name] = AdaptiveLimiter()
+    return _limiters[name]
+
+def merge_params(params, extra_body=None):
+    """ 将默认的extra_body与调用方传入的采样参数合并 """
+    params = dict(params)
+    if extra_body:
+        params["extra_body"] = {**extra_body, **params.get("extra_body", {})}
+    return params
+
+def get_contents(completion, n=1):
+    contents = [choice.message.content.strip() for choice in sorted(completion.choices, key=lambda c: c.index)]
+    return contents[0] if n == 1 else contents
+
+def cache_get(cache, key, validate=None):
+    """ validate(value)为False的缓存视为未命中，例如之前缓存的无法解析的回复 """
+    value = cache.get(key) if key is not None else None
+    if value is not None and validate is not None and not validate(value):
+        return None
+    return value
+
+def cache_put(cache, key, value, validate=None):
+    """ validate给出时只缓存通过校验的回复，无法解析的回复在下次运行时重新请求 """
+    if key is not None and (validate is None or validate(value)):
+        cache.put(key, value)
+
+def timed(client, request):
+    """ 发送同步请求并记录延迟、token用量和错误 """
+    endpoint = client_name(client)
+    start = time.perf_counter()
+    try:
+        completion = request()
+    except Exception as e:
+        metrics.observe(time.perf_counter() - start, error=type(e).__name__, endpoint=endpoint)
+        raise
+    metrics.observe(time.perf_counter() - start, usage=getattr(completion, "usage", None), endpoint=endpoint)
+    return completion
+
+async def send(client, request, limited=True):
+    """ 经过端点的限流器发送异步请求，并记录延迟(不含排队时间)、token用量和错误 """
+    endpoint = client_name(client)
+    async def run():
+        start = time.perf_counter()
+        try:
+            completion = await request()
+        except Exception as e:
+            metrics.observe(time.perf_counter() - start, error=type(e).__name__, endpoint=endpoint)
+            e.endpoint = endpoint  # with_retry据此把重试记到该端点下
+            raise
+        metrics.observe(time.perf_counter() - start, usage=getattr(completion, "usage", None), endpoint=endpoint)
+        return completion
+    if not limited:
+        return await run()
+    return await endpoint_limiter(client).run(run)
+
+async def with_retry(request, retries=3, backoff=1.0, max_backoff=30.0):
+    """ request为返回协程的函数，遇到可重试的错误时指数退避(带随机抖动)后重试，超过次数后抛出异常 """
+    for attempt in range(retries + 1):
+        try:
+            return await request()
+        except retry_errors() as e:
+            if attempt == retries:
+                raise
+            metrics.retry(endpoint=getattr(e, "endpoint", ""))
+            await asyncio.sleep(min(max_backoff, backoff * 2 ** attempt) * (0.5 + random.random()))
+
+async def gather_ordered(coros, concurrency):
+    """ 限制并发数执行协程，结果按输入顺序返回 """
+    semaphore = asyncio.Semaphore(concurrency)
+    async def run(coro):
+        async with semaphore:
+            return await coro
+    return await asyncio.gather(*[run(c) for c in coros])
+
+
 class MLLM:
-    def __init__(self, client, model_name="../models/Qwen2.5-VL-72B-Instruct"):
+    def __init__(self, client, model_name="../models/Qwen2.5-VL-72B-Instruct", cache=None, images=None):
         self.model_name = model_name
         self.client = client
-    
+        self.cache = cache  # ResponseCache，为None时不缓存
+        self.images = images  # ImageCache，为None时发送file://路径
+
+    def cache_key(self, image_path, text, n=1, params=None):
+        if self.cache is None:
+            return None
+        params = {"n": n, **(params or {})}
+        if getattr(text, "prefix", ""):
+            params["image_after_prefix"] = True  # 图片位置不同，回复可能不同
+        return self.cache.make_key(self.model_name, image_path, text, params)
+
+    def messages(self, image_path, text):
+        image = {"type": "image_url", "image_url": {"url": image_url(image_path, self.images)}}
+        prefix = getattr(text, "prefix", "")  # PrefixPrompts的固定前缀放在图片之前，才能跨图片命中前缀缓存
+        if prefix:
+            content = [{"type": "text", "text": prefix}, image, {"type": "text", "text": text[len(prefix):]}]
+        else:
+            content = [image, {"type": "text", "text": text}]
+        return [{"role": "user", "content": content}]
+
     def chat(self, image_path, text):
-        completion = self.client.chat.completions.create(
+        key = self.cache_key(image_path, text)
+        cached = cache_get(self.cache, key)
+        if cached is not None:
+            return cached
+        completion = timed(self.client, lambda: self.client.chat.completions.create(
                         model=self.model_name,
-                        messages=[
-                            {   "role": "user", 
-                                "content": [{"type": "image_url", "image_url": {"url": "file://"+image_path}},
-                                            {"type": "text", "text":text
-                                }] 
-                            }
-                        ]
-                    )
-        return completion.choices[0].message.content.strip()
+                        messages=self.messages(image_path, text)
+                    ))
+        content = completion.choices[0].message.content.strip()
+        cache_put(self.cache, key, content)
+        return content
+
+    async def achat(self, image_path, text, n=1, validate=None, **params):
+        """ chat的异步版本，n>1时返回n个回答组成的列表；validate(回复)为False时不写入缓存 """
+        # 读取图片计算hash、编码data URL都是阻塞的文件操作，放到线程中执行，不阻塞事件循环上的其他请求
+        key = await asyncio.to_thread(self.cache_key, image_path, text, n, params)
+        cached = cache_get(self.cache, key, validate)
+        if cached is not None:
+            return cached
+        messages = await asyncio.to_thread(self.messages, image_path, text)
+        completion = await send(self.client,
+                        lambda: get_async_client(self.client).chat.completions.create(
+                            model=self.model_name,
+                            messages=messages,
+                            n=n,
+                            **params
+                        ))
+        contents = get_contents(completion, n)
+        cache_put(self.cache, key, contents, validate)
+        return contents
+
+    async def abatch(self, image_paths, texts, concurrency=64, n=1, **params):
+        """ 批量请求，结果与输入顺序一致 """
+        return await gather_ordered([self.achat(p, t, n=n, **params) for p, t in zip(image_paths, texts)], concurrency)
+
+    def batch_chat(self, image_paths, texts, concurrency=64, n=1, **params):
+        return asyncio.run(self.abatch(image_paths, texts, concurrency=concurrency, n=n, **params))
+
 
 class LLM:
-    def __init__(self, client, model_name="../models/Qwen3-32B"):
+    extra_body = {
+            "chat_template_kwargs": {"enable_thinking": False},  # 关闭Qwen3的思考模式
+        }
+
+    def __init__(self, client, model_name="../models/Qwen3-32B", cache=None):
         self.client = client
         self.model_name = model_name
+        self.cache = cache  # ResponseCache，为None时不缓存
+
+    def cache_key(self, text, n=1, params=None):
+        if self.cache is None:
+            return None
+        return self.cache.make_key(self.model_name, None, text, {"n": n, **merge_params(params or {}, self.extra_body)})
 
     def chat(self, text):
-        completion = self.client.chat.completions.create(
+        key = self.cache_key(text)
+        cached = cache_get(self.cache, key)
+        if cached is not None:
+            return cached
+        completion = timed(self.client, lambda: self.client.chat.completions.create(
                 model=self.model_name,
                 messages=[
                     {"role": "user", "content": text}
                 ],
-                extra_body={
-                        "chat_template_kwargs": {"enable_thinking": False},  # 关闭Qwen3的思考模式
-                    },
-                )
-        
-        return completion.choices[0].message.content.strip()
+                extra_body=self.extra_body,
+                ))
+
+        content = completion.choices[0].message.content.strip()
+        cache_put(self.cache, key, content)
+        return content
+
+    async def achat(self, text, n=1, validate=None, **params):
+        """ chat的异步版本，n>1时返回n个回答组成的列表；validate(回复)为False时不写入缓存 """
+        key = self.cache_key(text, n, params)
+        cached = cache_get(self.cache, key, validate)
+        if cached is not None:
+            return cached
+        completion = await send(self.client,
+                lambda: get_async_client(self.client).chat.completions.create(
+                    model=self.model_name,
+                    messages=[
+                        {"role": "user", "content": text}
+                    ],
+                    n=n,
+                    **merge_params(params, self.extra_body),
+                ))
+        contents = get_contents(completion, n)
+        cache_put(self.cache, key, contents, validate)
+        return contents
+
+    async def atokenize(self, text):
+        """ 调用vLLM的/tokenize接口，得到套用chat模板后的token ids """
+        root = str(self.client.base_url).rstrip("/").removesuffix("/v1")
+        response = await get_http_pool().post(
+                f"{root}/tokenize",
+                headers={"Authorization": f"Bearer {self.client.api_key}"},
+                json={
+                    "model": self.model_name,
+                    "messages": [{"role": "user", "content": text}],
+                    "add_generation_prompt": True,
+                    **self.extra_body,
+                },
+            )
+        response.raise_for_status()
+        return response.json()["tokens"]
+
+    async def acompletions(self, texts, n=1, max_tokens=2048, **params):
+        """ vLLM多prompt completions接口：一次请求提交全部prompt """
+        prompts = await asyncio.gather(*[self.atokenize(t) for t in texts])
+        # 一次请求包含整批prompt，延迟与单条请求不可比，不经过自适应限流器
+        completion = await send(self.client, lambda: get_async_client(self.client).completions.create(
+                model=self.model_name,
+                prompt=prompts,
+                n=n,
+                max_tokens=max_tokens,
+                **params,
+            ), limited=False)
+        choices = sorted(completion.choices, key=lambda c: c.index)  # index = prompt序号*n + 采样序号
+        contents = [choice.text.strip() for choice in choices]
+        if n == 1:
+            return contents
+        return [contents[i*n:(i+1)*n] for i in range(len(texts))]
+
+    async def abatch(self, texts, concurrency=64, n=1, packed=False, **params):
+        """
+        批量请求，结果与输入顺序一致
+        :param packed: 优先走vLLM的多prompt completions接口，服务端不支持时退回并发chat请求
+        """
+        if packed:
+            keys = [self.cache_key(t, n, params) for t in texts]
+            results = [cache_get(self.cache, key) for key in keys]
+            missing = [i for i, r in enumerate(results) if r is None]  # 只提交未命中缓存的prompt
+            try:
+                if missing:
+                    contents = await self.acompletions([texts[i] for i in missing], n=n, **params)
+                    for i, content in zip(missing, contents):
+                        results[i] = content
+                        cache_put(self.cache, keys[i], content)
+                return results
+            except Exception as e:
+                print(f"packed completions unavailable, fallback to chat: {e}")
+        return await gather_ordered([self.achat(t, n=n, **params) for t in texts], concurrency)
+
+    def batch_chat(self, texts, concurrency=64, n=1, packed=False, **params):
+        return asyncio.run(self.abatch(texts, concurrency=concurrency, n=n, packed=packed, **params))
 
 
     # 发送http请求时要带上Bearer认证
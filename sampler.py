@@ -0,0 +1,179 @@
+import os
+import math
+import asyncio
+
+
+def even_order(n):
+    """
+    0..n-1的低差异排列(二进制位反转顺序)：任意长度的前缀都均匀分布在整个区间上
+    例如n=8时为0, 4, 2, 6, 1, 5, 3, 7
+    """
+    if n <= 1:
+        return list(range(n))
+    bits = (n - 1).bit_length()
+    order = []
+    for i in range(1 << bits):
+        j = int(format(i, f"0{bits}b")[::-1], 2)
+        if j < n:
+            order.append(j)
+    return order
+
+
+class Slot:
+    def __init__(self, q_type, label, pool):
+        self.q_type = q_type
+        self.label = label
+        self.pool = pool      # 该(类型, 正负样本)可用的图片，按抽取顺序排列
+        self.cursor = 0
+        self.accepted = 0
+        self.inflight = 0
+        self.screened = 0     # 在途且已通过第一步的数量
+
+
+class QuotaSampler:
+    """
+    按配额动态抽取图片：每个(类型, 正负样本)持续抽取新图片，直到接受的样本数达到quota
+    - 图片按even_order排列后依次轮流分给各个(类型, 正负样本)，每个的候选都均匀分布在整个图片列表上，
+      抽取顺序固定，同样的输入和通过率得到同样的图片
+    - 每种类型第一步(judge)的通过率在线估计(Beta先验，正负样本共用)；已通过第一步的在途样本视为基本会成功，
+      其余在途数量 = ceil((剩余配额 - 已通过第一步的在途数量) / 通过率 * overprovision)
+    - 通过第一步时配额已经可以由在途样本填满的样本直接丢弃，超出配额的样本不再写入
+    - 有prefilter(VGPrefilter)时，每个(类型, 正负样本)的候选只包含VG标注显示可能含有该类前提的图片，
+      没有标注的图片排在其后；各候选之间可能重叠，每张图片只分给第一个抽到它的(类型, 正负样本)
+    作为StageScheduler的输入(异步迭代)，screened/accept/reject由流水线的第一步、sink和丢弃回调调用
+    """
+    def __init__(self, image_dir, images, q_types, quota, labels=(False, True), done=None, rejected=None,
+                 prior=(1, 1), min_yield=0.05, overprovision=1.0, prefilter=None):
+        """
+        :param done: 已完成的(image, q_type, label)，例如断点恢复时从journal读出，计入配额且不再抽取
+        :param rejected: 已知不符合要求的(image, q_type)，例如PremiseStore中judge为No的记录，不再抽取
+        :param prior: 通过率的先验(通过数, 总数)
+        """
+        self.image_dir = image_dir
+        self.quota = quota
+        self.prior = prior
+        self.min_yield = min_yield
+        self.overprovision = overprovision
+        order = [images[i] for i in even_order(len(images))]
+        slots = [(q_type, label) for label in labels for q_type in q_types]
+        if prefilter is None:
+            self.slots = {key: Slot(*key, order[i::len(slots)]) for i, key in enumerate(slots)}
+        else:
+            pools = {q_type: self.eligible(prefilter, order, q_type) for q_type in q_types}
+            self.slots = {key: Slot(*key, pools[key[0]]) for key in slots}
+        self.done = done if done is not None else set()
+        self.rejected = rejected if rejected is not None else set()
+        self.used = {image for image, _, _ in self.done}  # 已经分给某个(类型, 正负样本)的图片
+        for image, q_type, label in self.done:
+            if (q_type, label) in self.slots:
+                self.slots[q_type, label].accepted += 1
+        self.stats = {q_type: [0, 0] for q_type in q_types}  # 类型 -> [第一步通过数, 第一步完成数]
+        self.surplus = 0
+        self.event = None
+
+    @staticmethod
+    def eligible(prefilter, order, q_type):
+        """ 按VG标注筛选q_type的候选：分数>=min_score的图片在前，没有标注的图片在后，分数为0的图片去掉 """
+        prefilter.load(order)
+        matched, unknown = [], []
+        for image in order:
+            score = prefilter.score(image, q_type)
+            if score is None:
+                unknown.append(image)
+            elif score >= prefilter.min_score:
+                matched.append(image)
+        return matched + unknown
+
+    @property
+    def total(self):
+        return self.quota * len(self.slots)
+
+    def yield_rate(self, q_type):
+        passed, finished = self.stats[q_type]
+        return max(self.min_yield, (passed + self.prior[0]) / (finished + self.prior[1]))
+
+    def allowed(self, slot):
+        """ 该(类型, 正负样本)允许的在途数量 """
+        need = self.quota - slot.accepted - slot.screened
+        if need <= 0:
+            return slot.screened
+        return slot.screened + math.ceil(need / self.yield_rate(slot.q_type) * self.overprovision)
+
+    def draw(self, slot):
+        """ 从候选中取下一张未完成的图片，候选用完时返回None """
+        while slot.cursor < len(slot.pool):
+            image = slot.pool[slot.cursor]
+            slot.cursor += 1
+            if image not in self.used and (image, slot.q_type) not in self.rejected:
+                self.used.add(image)
+                return image
+        return None
+
+    def finished(self):
+        return all(slot.inflight == 0 and (slot.accepted >= self.quota or slot.cursor >= len(slot.pool))
+                   for slot in self.slots.values())
+
+    async def __aiter__(self):
+        self.event = asyncio.Event()
+        while True:
+            issued = False
+            for slot in self.slots.values():
+                if slot.inflight < self.allowed(slot):
+                    image = self.draw(slot)
+                    if image is None:
+                        continue
+                    slot.inflight += 1
+                    issued = True
+                    yield {"image_path": os.path.join(self.image_dir, image), "q_type": slot.q_type, "label": slot.label}
+            if issued:
+                continue
+            if self.finished():
+                return
+            self.event.clear()
+            await self.event.wait()  # 等待有任务完成后重新计算在途数量
+
+    def screened(self, job):
+        """ 样本通过了第一步，返回是否继续后续步骤：配额已经可以由在途样本填满时不再继续，节省后续步骤的调用 """
+        slot = self.slots[job["q_type"], job["label"]]
+        job["judged"] = True
+        self.stats[job["q_type"]][0] += 1
+        self.stats[job["q_type"]][1] += 1
+        if slot.accepted + slot.screened >= self.quota:
+            self.surplus += 1
+            return False
+        job["screened"] = True
+        slot.screened += 1
+        return True
+
+    def complete(self, job):
+        slot = self.slots[job["q_type"], job["label"]]
+        slot.inflight -= 1
+        if job.get("screened"):
+            slot.screened -= 1
+        if self.event is not None:
+            self.event.set()
+        return slot
+
+    def accept(self, job):
+        """ 样本生成成功，返回是否需要写入(超出配额时为False) """
+        slot = self.complete(job)
+        if slot.accepted >= self.quota:
+            self.surplus += 1
+            return False
+        slot.accepted += 1
+        return True
+
+    def reject(self, job):
+        """ 样本在某个步骤被丢弃或失败 """
+        if not job.get("judged"):
+            self.stats[job["q_type"]][1] += 1
+        self.complete(job)
+
+    def report(self):
+        lines = ["type                  yield  accepted(neg/pos)  drawn(neg/pos)"]
+        for q_type, (passed, finished) in self.stats.items():
+            slots = [slot for slot in self.slots.values() if slot.q_type == q_type]
+            lines.append(f"{q_type:<20} {passed / finished if finished else 0:>6.0%}  "
+                         f"{'/'.join(str(s.accepted) for s in slots):>17}  {'/'.join(str(s.cursor) for s in slots):>14}")
+        lines.append(f"surplus samples dropped: {self.surplus}")  # 通过第一步但配额已满
+        return "\n".join(lines)
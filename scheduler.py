@@ -0,0 +1,138 @@
+import time
+import asyncio
+from tqdm import tqdm
+
+
+class Stage:
+    """
+    流水线中的一个步骤
+    :param fn: async fn(item) -> item，返回None表示该条数据在此步骤被丢弃
+    :param workers: 该步骤的并发worker数，按后端服务的承载能力设置
+    :param queue_size: 该步骤输入队列的容量，队列满时上游步骤等待
+    """
+    def __init__(self, name, fn, workers=32, queue_size=None):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.queue_size = queue_size or workers * 2
+        self.processed = 0   # 成功处理并交给下游的数量
+        self.dropped = 0     # 返回None被丢弃的数量
+        self.failed = 0      # 抛出异常的数量
+        self.busy = 0.0      # worker累计工作时间(秒)
+        self.max_depth = 0   # 输入队列的最大深度
+        self.queue = None
+
+
+class StageScheduler:
+    """
+    多步骤流水线调度器
+    相邻步骤之间是有界队列，每个步骤有自己的worker池，MLLM与LLM的步骤可以同时处于忙碌状态
+    定期输出每个步骤的吞吐量、队列深度和worker利用率，用于调整worker数量
+    """
+    def __init__(self, stages, on_error=None, on_drop=None, report_interval=60):
+        self.stages = stages
+        self.on_error = on_error  # on_error(stage, item, e)：某个步骤抛出异常
+        self.on_drop = on_drop    # on_drop(stage, item)：某个步骤返回None
+        self.report_interval = report_interval
+        self.start_time = None
+
+    async def worker(self, i, progress, sink):
+        """ sink或回调抛出的异常不在这里处理：worker结束后run()取消其余任务并重新抛出 """
+        stage = self.stages[i]
+        while True:
+            item = await stage.queue.get()
+            try:
+                start = time.perf_counter()
+                try:
+                    result = await stage.fn(item)
+                except Exception as e:
+                    stage.failed += 1
+                    result = None
+                    if self.on_error is not None:
+                        self.on_error(stage, item, e)
+                else:
+                    if result is None:
+                        stage.dropped += 1
+                        if self.on_drop is not None:
+                            self.on_drop(stage, item)
+                    else:
+                        stage.processed += 1
+                stage.busy += time.perf_counter() - start
+
+                if result is None:
+                    progress.update(1)
+                elif i + 1 < len(self.stages):
+                    next_stage = self.stages[i + 1]
+                    await next_stage.queue.put(result)
+                    next_stage.max_depth = max(next_stage.max_depth, next_stage.queue.qsize())
+                else:
+                    sink(result)
+                    progress.update(1)
+            finally:
+                stage.queue.task_done()
+
+    async def reporter(self):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            tqdm.write(self.format_metrics())
+
+    async def run(self, items, sink, total=None):
+        """ 将items(可迭代对象或异步迭代对象)依次送入第一个步骤，最后一个步骤的输出交给sink(item) """
+        self.start_time = time.perf_counter()
+        for stage in self.stages:
+            stage.queue = asyncio.Queue(maxsize=stage.queue_size)
+        progress = tqdm(total=total)
+        tasks = [asyncio.create_task(self.worker(i, progress, sink))
+                 for i, stage in enumerate(self.stages) for _ in range(stage.workers)]
+        tasks.append(asyncio.create_task(self.reporter()))
+
+        # 任何worker异常退出(例如sink写入失败)时立即结束整个运行，而不是在queue.join()上一直等待
+        feeder = asyncio.create_task(self.feed(items))
+        workers = tasks[:-1]
+        done, _ = await asyncio.wait([feeder, *workers], return_when=asyncio.FIRST_COMPLETED)
+
+        for task in tasks + [feeder]:
+            task.cancel()
+        await asyncio.gather(*tasks, feeder, return_exceptions=True)
+        progress.close()
+        for task in done:
+            if not task.cancelled() and task.exception() is not None:
+                raise task.exception()
+        return self.metrics()
+
+    async def feed(self, items):
+        first = self.stages[0]
+        if hasattr(items, "__aiter__"):
+            async for item in items:
+                await first.queue.put(item)
+                first.max_depth = max(first.max_depth, first.queue.qsize())
+        else:
+            for item in items:
+                await first.queue.put(item)
+                first.max_depth = max(first.max_depth, first.queue.qsize())
+        # 上游的数据在task_done之前已经放入下游队列，因此按顺序join即可保证全部完成
+        for stage in self.stages:
+            await stage.queue.join()
+
+    def metrics(self):
+        elapsed = time.perf_counter() - self.start_time
+        return {
+            stage.name: {
+                "workers": stage.workers,
+                "processed": stage.processed,
+                "dropped": stage.dropped,
+                "failed": stage.failed,
+                "throughput": (stage.processed + stage.dropped) / elapsed if elapsed > 0 else 0,  # 条/秒
+                "utilization": stage.busy / (elapsed * stage.workers) if elapsed > 0 else 0,
+                "queue_depth": stage.queue.qsize() if stage.queue is not None else 0,
+                "max_queue_depth": stage.max_depth,
+            }
+            for stage in self.stages
+        }
+
+    def format_metrics(self):
+        lines = ["stage      workers  done  drop  fail  items/s  util  queue(max)"]
+        for name, m in self.metrics().items():
+            lines.append(f"{name:<10} {m['workers']:>7} {m['processed']:>5} {m['dropped']:>5} {m['failed']:>5} "
+                         f"{m['throughput']:>8.2f} {m['utilization']:>5.0%}  {m['queue_depth']}({m['max_queue_depth']})")
+        return "\n".join(lines)
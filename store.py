@@ -0,0 +1,78 @@
+import os
+import sqlite3
+import threading
+
+
+class PremiseStore:
+    """
+    step1(judge) + step2(caption) 结果的持久化存储，按(图片, 类型, 模型)保存一次
+    main.py / sft.py / grpo.py 以及新的数据划分都从这里读取，只需要再运行问题生成(和回答生成)步骤
+    premise为"No"的图片也会记录，避免重复判断
+    """
+    def __init__(self, path="./dataset/premise_store.sqlite"):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS premises "
+                          "(image_path TEXT, q_type TEXT, model TEXT, premise TEXT, caption TEXT, "
+                          "PRIMARY KEY (image_path, q_type, model))")
+
+    def get(self, image_path, q_type, model):
+        """ 返回(premise, caption)，不存在时返回None """
+        with self.lock:
+            row = self.conn.execute("SELECT premise, caption FROM premises WHERE image_path=? AND q_type=? AND model=?",
+                                    (image_path, q_type, model)).fetchone()
+        return row
+
+    def put(self, image_path, q_type, model, premise, caption=None):
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO premises VALUES (?, ?, ?, ?, ?)",
+                              (image_path, q_type, model, premise, caption))
+
+    def put_premises(self, image_path, model, premises):
+        """ 多类型judge的结果，premises为{q_type: premise}；已有的记录(可能已生成caption)不覆盖 """
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO premises VALUES (?, ?, ?, ?, NULL)",
+                                  [(image_path, q_type, model, premise) for q_type, premise in premises.items()])
+
+    def premises(self, image_paths, model, chunk=900):
+        """ 按图片读取所有类型的premise，返回{image_path: {q_type: premise}} """
+        image_paths = list(image_paths)
+        result = {}
+        for i in range(0, len(image_paths), chunk):
+            paths = image_paths[i:i + chunk]
+            with self.lock:
+                rows = self.conn.execute("SELECT image_path, q_type, premise FROM premises "
+                                         f"WHERE model=? AND image_path IN ({','.join('?' * len(paths))})",
+                                         [model] + paths).fetchall()
+            for image_path, q_type, premise in rows:
+                result.setdefault(image_path, {})[q_type] = premise
+        return result
+
+    def candidates(self, q_type, model, image_dir=None):
+        """ 某类型下已通过筛选且生成了caption的图片，按路径排序保证划分可复现 """
+        sql = "SELECT image_path, premise, caption FROM premises " \
+              "WHERE q_type=? AND model=? AND LOWER(premise)!='no' AND caption IS NOT NULL"
+        args = [q_type, model]
+        if image_dir is not None:
+            prefix = os.path.join(image_dir, "")
+            sql += " AND SUBSTR(image_path, 1, ?)=?"
+            args += [len(prefix), prefix]
+        with self.lock:
+            return self.conn.execute(sql + " ORDER BY image_path", args).fetchall()
+
+    def rejected(self, model, image_dir=None):
+        """ judge结果为No的(image_path, q_type) """
+        sql = "SELECT image_path, q_type FROM premises WHERE model=? AND LOWER(premise)='no'"
+        args = [model]
+        if image_dir is not None:
+            prefix = os.path.join(image_dir, "")
+            sql += " AND SUBSTR(image_path, 1, ?)=?"
+            args += [len(prefix), prefix]
+        with self.lock:
+            return set(self.conn.execute(sql, args).fetchall())
+
+    def close(self):
+        self.conn.close()
@@ -1,75 +1,177 @@
 import json
-from openai import OpenAI
-import requests
+import re
+import asyncio
 from tqdm import tqdm
-import os
 from utils import *
+from journal import Journal
+from image_cache import ImageCache, image_url
+from image_catalog import ImageCatalog
+from model_chat import MLLM, Router, make_client, get_async_client, replica_errors, with_retry, gather_ordered, timed
+from metrics import start_metrics, set_tags, tagged, metrics
 
-def VLLM_chat(model_name, client, image_path, text):
-    completion = client.chat.completions.create(
+def VLLM_chat(model_name, client, image_path, text, images=None):
+    completion = timed(client, lambda: client.chat.completions.create(
     model=model_name,
     messages=[
         {   "role": "user", 
             "content": [{"type": "image_url", 
-            "image_url": {"url": "file://"+image_path}},
+            "image_url": {"url": image_url(image_path, images)}},
                 {"type": "text", 
             "text":text
             }] 
         }
     ]
-    )
+    ))
     return completion.choices[0].message.content.strip()
 
 
-def main(model_name ="../models/Qwen2.5-VL-7B-Instruct", port="7001"):
+def result_key(row):
+    return (row["id"], row["type"], row["label"], "test")
+
+
+def check_images(data):
+    """ 在调用模型之前通过图片索引一次性找出不存在的图片，返回图片存在的数据 """
+    catalog = ImageCatalog()
+    missing = set(catalog.missing(dic["image_path"] for dic in data))
+    catalog.close()
+    for image_path in sorted(missing):
+        print(f"image {image_path} is not exists!")
+    return [dic for dic in data if dic["image_path"] not in missing]
+
+
+def main(model_name ="../models/Qwen2.5-VL-7B-Instruct", port="7001", images=None):
+    """ images: ImageCache，为None时发送file://路径（服务端需要--allowed-local-media-path） """
+    start_metrics("test")
+    set_tags(stage="test")
+    from openai import OpenAI
     client = OpenAI(
                     base_url=f"http://localhost:{port}/v1",
                     api_key="00000000",
                 )
     test_path = "./dataset/incorrect_premise_questions_Test.json"
     output_path = f'./results/test_results_{model_name.replace("../models/", "")}.jsonl'
-    exist_ids = set()
-    try:
-        with open(output_path, "r") as f:
-            lines = f.readlines()
-            for line in lines:
-                exist_ids.add(json.loads(line)["id"])
-    except:
-        pass
+    journal = Journal(output_path, key_fn=result_key)  # 中断恢复
 
     with open(test_path, "r") as f:
         data = json.load(f)
+    data = check_images(data)
 
     for dic in tqdm(data):
-        if dic["id"] in exist_ids:
+        if result_key(dic) in journal:
             continue
         question = dic.get("question", None) 
         image_path = dic.get("image_path")
-        if os.path.exists(image_path):             
-            try:
-                response = VLLM_chat(model_name, client, image_path, question)
-            except:
-                continue
-            result = {
-                "id" : dic.get("id", None),
-                "image_path": dic.get("image_path", None),
-                "type": dic.get("type", None),
-                "question":question,
-                "label":dic.get("label"),
-                "premise":dic.get("premise", None),
-                "response":response
-            }
-            with open(output_path, "a") as f:
-                f.write(json.dumps(result) + "\n")
-        else:
-            print(f"image {image_path} is not exists!")
+        try:
+            response = VLLM_chat(model_name, client, image_path, question, images)
+        except:
+            continue
+        result = {
+            "id" : dic.get("id", None),
+            "image_path": dic.get("image_path", None),
+            "type": dic.get("type", None),
+            "question":question,
+            "label":dic.get("label"),
+            "premise":dic.get("premise", None),
+            "response":response
+        }
+        journal.append(result)
+    journal.close()
     jsonl_to_json(output_path)
     print(f"Finished! Stored history to {output_path}")
 
 
 
+def load_manifest(path="./scripts/test_model.sh"):
+    """
+    待测模型清单，返回[(model_name, base_url)]
+    .json: [{"model": ..., "base_url": ...}]，也可以用"port"代替"base_url"
+    其他文件按启动脚本解析其中的"vllm serve <model> ... --port <port>"
+    """
+    if path.endswith(".json"):
+        with open(path, "r") as f:
+            return [(m["model"], m.get("base_url") or f"http://localhost:{m['port']}/v1") for m in json.load(f)]
+    manifest = []
+    with open(path, "r") as f:
+        for line in f:
+            match = re.search(r"vllm serve (\S+).*--port (\d+)", line)
+            if match:
+                manifest.append((match.group(1), f"http://localhost:{match.group(2)}/v1"))
+    return manifest
+
+
+async def served_models(client):
+    """ 端点上实际部署的模型，连接失败时返回空集合；Router取所有副本上部署的模型的并集 """
+    clients = [endpoint.client for endpoint in client.endpoints] if isinstance(client, Router) else [client]
+    models = set()
+    for c in clients:
+        try:
+            models |= {m.id for m in (await get_async_client(c).models.list()).data}
+        except replica_errors():
+            continue
+    return models
+
+
+async def atest_model(model_name, base_url, data, images=None, concurrency=32, retries=3, position=0):
+    """ 对一个模型跑完整个测试集，结果追加到该模型自己的Journal中，可中断恢复 """
+    set_tags(stage="test")  # 只作用于本模型的任务
+    client = make_client(base_url)
+    if model_name not in await served_models(client):
+        tqdm.write(f"skip {model_name}: not served at {base_url}")
+        return
+    mllm = MLLM(client, model_name=model_name, images=images)
+    output_path = f'./results/test_results_{model_name.replace("../models/", "")}.jsonl'
+    journal = Journal(output_path, key_fn=result_key)
+    todo = [dic for dic in data if result_key(dic) not in journal]
+    progress = tqdm(total=len(todo), desc=model_name.replace("../models/", ""), position=position)
+
+    async def run(dic):
+        try:
+            with tagged(q_type=dic.get("type")):
+                response = await with_retry(lambda: mllm.achat(dic["image_path"], dic.get("question", None)), retries=retries)
+        except Exception as e:
+            tqdm.write(f"{model_name} failed on {dic.get('id')}: {e!r}")  # 下次运行时重试
+            return
+        finally:
+            progress.update(1)
+        journal.append({
+            "id" : dic.get("id", None),
+            "image_path": dic.get("image_path", None),
+            "type": dic.get("type", None),
+            "question": dic.get("question", None),
+            "label": dic.get("label"),
+            "premise": dic.get("premise", None),
+            "response": response
+        })
+
+    await gather_ordered([run(dic) for dic in todo], concurrency)
+    progress.close()
+    journal.close()
+    jsonl_to_json(output_path)
+
+
+def sweep(manifest="./scripts/test_model.sh", concurrency=32, images=None, test_path="./dataset/incorrect_premise_questions_Test.json"):
+    """
+    同时测试清单中的所有模型，每个模型有自己的并发上限，图片缓存在模型之间共享
+    清单中未部署(端口上不是该模型)的条目会被跳过
+    """
+    start_metrics("test")
+    with open(test_path, "r") as f:
+        data = json.load(f)
+    data = check_images(data)
+    images = images if images is not None else ImageCache()
+
+    async def run_all():
+        await asyncio.gather(*[atest_model(model_name, base_url, data, images, concurrency, position=i)
+                               for i, (model_name, base_url) in enumerate(load_manifest(manifest))])
+    asyncio.run(run_all())
+    print(metrics.format_summary())
+    print(f"Finished! image cache hits {images.hits}, misses {images.misses}")
+
+
+
 
 if __name__=="__main__":
+    # sweep()  # 同时测试scripts/test_model.sh中部署的所有模型
     # main(model_name="../models/Qwen2.5-VL-7B-Instruct", port="7001")
     # main(model_name="../models/InternVL3-8B-hf", port="7005")
     # main(model_name="../models/Ola-7b", port="7002")
@@ -1,4 +1,5 @@
 import json
+import os
 
 def sample_evenly(lst, n=1000):
     # 数据集采样
@@ -8,54 +9,157 @@ def sample_evenly(lst, n=1000):
     indices = [int(i * step) for i in range(n)]
     return [lst[i] for i in indices]
 
-def process():
-    att_path = "attributes_test.json"
-    result_path = "./test_results/test_results_InternVL3-8B-hf.jsonl"
-    json_objects = []
-    with open(result_path, 'r') as jsonl_file:
-        # 逐行读取文件
+def join_jsonl(jsonl_file_path, right_rows, left_key, right_key, attach=None, how="left", stats=None):
+    """
+    结果文件的按key连接：对right_rows按right_key建一次hash索引，再流式读取JSONL文件逐行匹配
+    JSONL一侧不会整体读入内存，返回生成器
+    :param attach: attach(row, match)，把匹配到的右侧数据合并到row中，默认row.update(match)
+    :param how: left 保留未匹配的行 / inner 丢弃未匹配的行
+    :param stats: 传入dict时写入匹配统计：matched、unmatched_left(数量)、unmatched_left_sample(前20个key)、unmatched_right(右侧未被匹配的key)
+    """
+    if how not in ("left", "inner"):
+        raise ValueError(f"不支持的连接方式: {how}")
+    index = {}
+    for row in right_rows:
+        index[row[right_key]] = row  # key重复时以最后一条为准
+    attach = attach or (lambda row, match: row.update(match))
+    stats = {} if stats is None else stats
+    stats.update(matched=0, unmatched_left=0, unmatched_left_sample=[], unmatched_right=[])
+    used = set()
+
+    for row in iter_jsonl(jsonl_file_path):
+        key = row.get(left_key)
+        match = index.get(key)
+        if match is None:
+            stats["unmatched_left"] += 1
+            if len(stats["unmatched_left_sample"]) < 20:
+                stats["unmatched_left_sample"].append(key)
+            if how == "inner":
+                continue
+        else:
+            stats["matched"] += 1
+            used.add(key)
+            attach(row, match)
+        yield row
+    stats["unmatched_right"] = [key for key in index if key not in used]
+
+def attach_attributes(dic, att):
+    dic["attributes"] = att["tuplist"][0]
+
+def process(att_path="attributes_test.json", result_path="./test_results/test_results_InternVL3-8B-hf.jsonl"):
+    """ 把attributes_test.json中的属性按question_id连接到测试结果上 """
+    with open(att_path, "r") as f:
+        atts = json.load(f)
+    stats = {}
+    rows = join_jsonl(result_path, atts, left_key="question_id", right_key="qid", attach=attach_attributes, stats=stats)
+    write_json_array(rows, export_path(result_path, "json"))
+    print(f"matched {stats['matched']} rows, {stats['unmatched_left']} rows without attributes "
+          f"(e.g. {stats['unmatched_left_sample'][:5]}), {len(stats['unmatched_right'])} attributes unused")
+
+
+# 导出Parquet/Arrow时各字段的类型，其他字段统一按字符串保存
+EXPORT_COLUMNS = {
+    "id": "string",
+    "type": "string",
+    "label": "bool",
+    "premise": "string",
+    "question": "string",
+    "response": "string",
+    "judge": "bool",
+}
+
+def iter_jsonl(jsonl_file_path):
+    """ 逐行读取JSONL文件，跳过空行 """
+    with open(jsonl_file_path, 'r') as jsonl_file:
         for line in jsonl_file:
-            # 去除行尾可能存在的空白字符（包括换行符）
             line = line.strip()
             if line:
-                # 将每一行的JSON字符串解析为Python对象
-                json_objects.append(json.loads(line))
-    with open(att_path, "r") as f:
-        atts = json.load(f)
-    for dic in json_objects:
-        for att in atts:
-            if att["qid"] == dic["question_id"]:
-                dic["attributes"] = att[ "tuplist"][0]
-    with open(result_path.replace(".jsonl", ".json"), "w") as f:
-        json.dump(json_objects, f, indent=4)
-        
+                yield json.loads(line)
+
+def export_path(jsonl_file_path, fmt="json"):
+    """ 只替换文件扩展名，目录名中的jsonl不受影响 """
+    return os.path.splitext(jsonl_file_path)[0] + {"json": ".json", "parquet": ".parquet", "arrow": ".arrow"}[fmt]
+
+def write_json_array(rows, json_file_path):
+    """ 增量写出JSON数组，格式与json.dump(..., ensure_ascii=False, indent=4)一致 """
+    with open(json_file_path, 'w') as json_file:
+        first = True
+        for row in rows:
+            json_file.write("[\n" if first else ",\n")
+            text = json.dumps(row, ensure_ascii=False, indent=4)
+            json_file.write("\n".join("    " + line for line in text.split("\n")))
+            first = False
+        json_file.write("[]" if first else "\n]")
+
+def write_arrow(rows, output_path, fmt="parquet", batch_size=10000, columns=None):
+    """
+    按批写出Parquet/Arrow文件
+    schema包含EXPORT_COLUMNS中的全部字段，以及columns(为None时取第一批数据中出现的字段)
+    之后的数据出现schema之外的字段时抛出ValueError，不丢弃数据
+    """
+    import pyarrow as pa  # 可选依赖，只有导出Parquet/Arrow时需要
+    import pyarrow.parquet as pq
+
+    def to_value(key, value):
+        if EXPORT_COLUMNS.get(key, "string") == "string" and value is not None and not isinstance(value, str):
+            return json.dumps(value, ensure_ascii=False)
+        return value
+
+    writer, schema, batch = None, None, []
+    def flush():
+        nonlocal writer, schema
+        if schema is None:
+            keys = list(dict.fromkeys([*(columns if columns is not None else (k for row in batch for k in row)), *EXPORT_COLUMNS]))
+            schema = pa.schema([(k, pa.bool_() if EXPORT_COLUMNS.get(k) == "bool" else pa.string()) for k in keys])
+            if fmt == "parquet":
+                writer = pq.ParquetWriter(output_path, schema)
+            else:
+                writer = pa.ipc.new_file(output_path, schema)
+        unknown = {k for row in batch for k in row} - set(schema.names)
+        if unknown:
+            writer.close()
+            raise ValueError(f"columns {sorted(unknown)} first appear after the schema was fixed")
+        columns_data = {name: [to_value(name, row.get(name)) for row in batch] for name in schema.names}
+        writer.write_batch(pa.record_batch(columns_data, schema=schema))
+        batch.clear()
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            flush()
+    if batch or schema is None:
+        flush()
+    writer.close()
+
+def export_jsonl(jsonl_file_path, fmt="json", output_path=None):
+    """
+    流式导出JSONL文件，内存占用与文件大小无关
+    :param fmt: json / parquet / arrow
+    :return: 输出文件路径
+    """
+    output_path = output_path or export_path(jsonl_file_path, fmt)
+    tmp_path = output_path + ".tmp"  # 写完再替换，避免中断时留下不完整的文件
+    if fmt == "json":
+        write_json_array(iter_jsonl(jsonl_file_path), tmp_path)
+    else:
+        try:
+            write_arrow(iter_jsonl(jsonl_file_path), tmp_path, fmt=fmt)
+        except ValueError:
+            # 后面的数据出现了新字段：先扫描一遍得到全部字段再重写
+            columns = list(dict.fromkeys(k for row in iter_jsonl(jsonl_file_path) for k in row))
+            write_arrow(iter_jsonl(jsonl_file_path), tmp_path, fmt=fmt, columns=columns)
+    os.replace(tmp_path, output_path)
+    return output_path
 
 def jsonl_to_json(jsonl_file_path):
     """
     将JSONL文件转换为包含JSON对象数组的JSON文件。
 
     :param jsonl_file_path: 输入的JSONL文件路径。
-    :param json_file_path: 输出的JSON文件路径。
     """
     try:
-        # 用于存储从JSONL文件中读取的所有对象
-        json_objects = []
-
-        with open(jsonl_file_path, 'r') as jsonl_file:
-            # 逐行读取文件
-            for line in jsonl_file:
-                # 去除行尾可能存在的空白字符（包括换行符）
-                line = line.strip()
-                if line:
-                    # 将每一行的JSON字符串解析为Python对象
-                    json_objects.append(json.loads(line))
-
-        with open(jsonl_file_path.replace("jsonl", "json"), 'w') as json_file:
-            # 将包含所有对象的列表写入到JSON文件中
-            # indent=4 用于美化输出，使其更具可读性
-            json.dump(json_objects, json_file, ensure_ascii=False, indent=4)
-        
-        print(f'成功将 "{jsonl_file_path}" 转换为 "{jsonl_file_path.replace("jsonl", "json")}"。\n')
+        json_file_path = export_jsonl(jsonl_file_path, fmt="json")
+        print(f'成功将 "{jsonl_file_path}" 转换为 "{json_file_path}"。\n')
 
     except FileNotFoundError:
         print(f"错误：找不到文件 '{jsonl_file_path}'。")
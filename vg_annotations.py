@@ -0,0 +1,226 @@
+import os
+import re
+import sys
+import json
+import sqlite3
+import threading
+from utils import sample_evenly
+
+
+def iter_json_array(path):
+    """ 逐条读取Visual Genome的大JSON数组，安装了ijson时流式解析，否则整体读入 """
+    try:
+        import ijson
+    except ImportError:
+        with open(path, "r") as f:
+            yield from json.load(f)
+        return
+    with open(path, "rb") as f:
+        yield from ijson.items(f, "item")
+
+
+def image_id(image):
+    """ VG_100K/2345.jpg -> 2345，不是VG命名的文件返回None """
+    name = os.path.splitext(os.path.basename(image))[0]
+    return int(name) if name.isdigit() else None
+
+
+def names(obj):
+    # 不同版本的VG标注中物体名称的字段分别是name或names
+    return obj.get("names") or ([obj["name"]] if "name" in obj else [])
+
+
+class VGIndex:
+    """
+    Visual Genome标注的按图片索引（SQLite），每张图片一行：
+    objects(物体名称->数量)、attributes(属性词)、predicates(关系谓词)、regions(区域描述拼接成的文本)
+    由build()从VG的objects/attributes/relationships/region_descriptions.json构建一次
+    """
+    files = {
+        "objects": "objects.json",
+        "attributes": "attributes.json",
+        "predicates": "relationships.json",
+        "regions": "region_descriptions.json",
+    }
+
+    def __init__(self, path="./dataset/vg_index.sqlite"):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS images "
+                          "(image_id INTEGER PRIMARY KEY, objects TEXT, attributes TEXT, predicates TEXT, regions TEXT)")
+
+    @staticmethod
+    def summarize(column, entry):
+        """ 把一张图片的一类标注归纳成索引中该列的值 """
+        if column == "objects":
+            counts = {}
+            for obj in entry.get("objects", []):
+                for name in names(obj):
+                    name = name.strip().lower()
+                    counts[name] = counts.get(name, 0) + 1
+            return entry["image_id"], counts
+        if column == "attributes":
+            words = sorted({a.strip().lower() for obj in entry.get("attributes") or [] for a in obj.get("attributes") or []})
+            return entry["image_id"], words
+        if column == "predicates":
+            return entry["image_id"], sorted({r["predicate"].strip().lower() for r in entry.get("relationships", [])})
+        regions = entry.get("regions", [])
+        return entry.get("id", regions[0]["image_id"] if regions else None), " | ".join(r["phrase"].strip().lower() for r in regions)
+
+    def build(self, vg_dir, batch_size=1000):
+        """ 流式读取VG标注文件，按列写入索引；缺少的文件跳过 """
+        for column, file_name in self.files.items():
+            path = os.path.join(vg_dir, file_name)
+            if not os.path.exists(path):
+                print(f"skip missing {path}")
+                continue
+            sql = f"INSERT INTO images(image_id, {column}) VALUES (?, ?) " \
+                  f"ON CONFLICT(image_id) DO UPDATE SET {column}=excluded.{column}"
+            batch = []
+            for entry in iter_json_array(path):
+                key, value = self.summarize(column, entry)
+                if key is None:
+                    continue
+                batch.append((key, value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)))
+                if len(batch) >= batch_size:
+                    with self.lock, self.conn:
+                        self.conn.executemany(sql, batch)
+                    batch = []
+            with self.lock, self.conn:
+                self.conn.executemany(sql, batch)
+            print(f"indexed {file_name}")
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM images").fetchone()[0]
+
+    def get_many(self, image_ids, chunk=900):
+        """ 批量读取，返回{image_id: 标注摘要}，没有标注的图片不在结果中 """
+        image_ids = list(image_ids)
+        result = {}
+        for i in range(0, len(image_ids), chunk):
+            ids = image_ids[i:i + chunk]
+            with self.lock:
+                rows = self.conn.execute("SELECT image_id, objects, attributes, predicates, regions FROM images "
+                                         f"WHERE image_id IN ({','.join('?' * len(ids))})", ids).fetchall()
+            for key, objects, attributes, predicates, regions in rows:
+                result[key] = {
+                    "objects": json.loads(objects) if objects else {},
+                    "attributes": json.loads(attributes) if attributes else [],
+                    "predicates": json.loads(predicates) if predicates else [],
+                    "regions": regions or "",
+                }
+        return result
+
+    def close(self):
+        self.conn.close()
+
+
+# 各类型前提相关的词表，用于在属性、谓词、物体名称和区域描述中匹配
+COLOR_WORDS = {"red", "orange", "yellow", "green", "blue", "purple", "pink", "brown", "black", "white", "gray", "grey",
+               "silver", "gold", "tan", "beige", "wooden", "metal", "plastic", "glass", "striped", "round", "square"}
+STATE_WORDS = {"open", "closed", "wet", "dry", "broken", "empty", "full", "lit", "on", "off", "parked", "sitting",
+               "standing", "sleeping", "running", "cut", "sliced", "folded", "dirty", "clean", "melted", "frozen"}
+TEXT_WORDS = {"sign", "text", "word", "words", "letter", "letters", "writing", "logo", "label", "number", "numbers",
+              "banner", "poster", "plate", "menu", "clock", "newspaper", "book", "screen", "billboard"}
+SYMBOL_WORDS = {"sign", "arrow", "logo", "flag", "symbol", "icon", "traffic light", "stop sign", "emblem", "signal"}
+SPATIAL_WORDS = {"on", "in", "under", "behind", "above", "below", "near", "beside", "next to", "in front of",
+                 "on top of", "inside", "left of", "right of", "across", "along", "against", "between"}
+POSSESSIVE_WORDS = {"has", "have", "of", "with", "belonging to", "wearing", "wears", "has a", "owned by"}
+INTERACTION_WORDS = {"holding", "riding", "eating", "playing", "throwing", "carrying", "looking at", "using",
+                     "pulling", "pushing", "hitting", "catching", "feeding", "drinking", "watching", "walking",
+                     "kicking", "touching", "petting", "driving", "reading", "talking to"}
+EMOTION_WORDS = {"smiling", "happy", "sad", "laughing", "angry", "crying", "scared", "surprised", "excited",
+                 "upset", "frowning", "smile", "grin", "joyful", "bored", "tired"}
+LIVING_WORDS = {"man", "woman", "person", "people", "boy", "girl", "child", "kid", "player", "lady", "guy",
+                "dog", "cat", "horse", "bird", "cow", "sheep", "elephant", "bear", "giraffe", "zebra"}
+
+
+def count_words(words, vocab):
+    return sum(1 for w in words if w in vocab)
+
+def count_phrases(text, vocab):
+    return sum(1 for v in vocab if re.search(r"\b" + re.escape(v) + r"\b", text))
+
+
+# 每种类型的打分规则，分数为0的图片不送入judge；Logical/Commonsense没有直接对应的标注，按标注的丰富程度排序
+RULES = {
+    "Entity Existence": lambda a: len(a["objects"]),
+    "Visual Attributes": lambda a: count_words(a["attributes"], COLOR_WORDS),
+    "Numeric Attributes": lambda a: sum(1 for n in a["objects"].values() if n >= 2),
+    "State Attributes": lambda a: count_words(a["attributes"], STATE_WORDS),
+    "OCR Content": lambda a: count_words(a["objects"], TEXT_WORDS) + count_phrases(a["regions"], {"says", "written", "reads"}),
+    "Symbol Meaning": lambda a: count_words(a["objects"], SYMBOL_WORDS) + count_phrases(a["regions"], SYMBOL_WORDS),
+    "Spatial Relation": lambda a: count_words(a["predicates"], SPATIAL_WORDS),
+    "Interaction Relation": lambda a: count_words(a["predicates"], INTERACTION_WORDS),
+    "Possessive Relation": lambda a: count_words(a["predicates"], POSSESSIVE_WORDS),
+    "Emotion": lambda a: (count_words(a["attributes"], EMOTION_WORDS) + count_phrases(a["regions"], EMOTION_WORDS))
+                         * (count_words(a["objects"], LIVING_WORDS) > 0),
+    "Scene": lambda a: len(a["objects"]) + 1,
+    "Logical": lambda a: len(a["objects"]) + len(a["predicates"]),
+    "Commonsense": lambda a: len(a["objects"]) + len(a["predicates"]),
+}
+
+
+class VGPrefilter:
+    """
+    在调用MLLM judge之前，按VG标注给每张图片在每种类型上打分
+    分数为0的图片直接跳过；没有VG标注的图片(非VG命名或不在索引中)排在有效图片之后补足数量
+    """
+    def __init__(self, index, rules=None, min_score=1):
+        self.index = index
+        self.rules = rules or RULES
+        self.min_score = min_score
+        self.annotations = {}
+
+    def load(self, images):
+        missing = {image_id(image) for image in images} - set(self.annotations) - {None}
+        self.annotations.update(self.index.get_many(missing))
+
+    def score(self, image, q_type):
+        """ 没有标注时返回None """
+        annotation = self.annotations.get(image_id(image))
+        if annotation is None:
+            return None
+        return self.rules[q_type](annotation)
+
+    def select(self, images, q_type, n, exclude=(), ranked=False):
+        """
+        为q_type选出n张图片：优先从分数>=min_score的图片中均匀采样(ranked=True时取分数最高的)，不足时用没有标注的图片补足
+        images的顺序决定结果，相同输入得到相同的选择
+        """
+        self.load(images)
+        exclude = set(exclude)
+        eligible, unknown = [], []
+        for image in images:
+            if image in exclude:
+                continue
+            score = self.score(image, q_type)
+            if score is None:
+                unknown.append(image)
+            elif score >= self.min_score:
+                eligible.append((image, score))
+        if ranked:
+            eligible.sort(key=lambda x: -x[1])  # 稳定排序，同分保持原顺序
+            chosen = [image for image, _ in eligible[:n]]
+        else:
+            chosen = sample_evenly([image for image, _ in eligible], n=n)
+        if len(chosen) < n:
+            chosen += sample_evenly(unknown, n=n - len(chosen))
+        return chosen
+
+
+def load_prefilter(path="./dataset/vg_index.sqlite"):
+    """ 索引存在时返回VGPrefilter，否则返回None(不做预筛选) """
+    if not os.path.exists(path):
+        return None
+    return VGPrefilter(VGIndex(path))
+
+
+if __name__=="__main__":
+    # python vg_annotations.py /path/to/visual_genome [./dataset/vg_index.sqlite]
+    index = VGIndex(*sys.argv[2:3])
+    index.build(sys.argv[1])
+    print(f"{len(index)} images indexed")